@@ -0,0 +1,329 @@
+"""Benchmarks for the ASN.1 decoders, encoders and container parsing.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_asn1                   # print the results
+    python -m benchmarks.bench_asn1 --update-baseline # record a local baseline
+    python -m benchmarks.bench_asn1 --check           # compare with it
+
+Every case reports throughput (nodes/s, lookups/s for path queries or
+objects/s for lazy objects, and MB/s over the whole input), peak traced
+memory and the number of retained blocks: the blocks the run left
+allocated, from a tracemalloc snapshot diff. Temporary allocations that
+were freed again are not counted. The decoding engines only build their
+result, so lazy engines are not forced to expand it.
+
+Throughput depends on the machine, so the baseline is not kept in the
+repository. With ``--check`` a case fails when its throughput drops, or its
+peak memory grows, by more than ``--tolerance`` relative to a baseline
+recorded on the same machine.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import modules.asn1 as asn1
+from classes.Asn1Object import Asn1Object
+from classes.Asn1Tree import Asn1Tree
+from classes.LazyAsn1Object import LazyAsn1Object
+from modules.AsnDecoder import pretty_print
+from modules.AsnPath import compile_path
+from modules.KeySchemas import KEY_HEADER
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+GOST_OIDS = ("1.2.643.7.1.1.1.1", "1.2.643.7.1.1.6.1", "1.2.643.7.1.1.2.2", "1.2.643.2.2.36.0",
+             "1.2.643.2.2.37.3.10", "1.2.643.7.1.2.1.1.1")
+
+
+def _write_header(encoder, rng, extensions):
+    encoder.enter(asn1.Numbers.Sequence)
+    encoder.enter(asn1.Numbers.Sequence)
+    encoder.write(b'\x06\x80', asn1.Numbers.BitString)
+    encoder.enter(asn1.Numbers.Sequence)
+    encoder.write(b'\x05\xa0', asn1.Numbers.BitString)
+    encoder.enter(0, asn1.Classes.Context)
+    encoder.write(GOST_OIDS[1], asn1.Numbers.ObjectIdentifier)
+    encoder.enter(asn1.Numbers.Sequence)
+    encoder.write(GOST_OIDS[3], asn1.Numbers.ObjectIdentifier)
+    encoder.write(GOST_OIDS[2], asn1.Numbers.ObjectIdentifier)
+    encoder.leave()
+    encoder.leave()
+    encoder.leave()
+    encoder.write(rng.randbytes(64), 5, cls=asn1.Classes.Context)
+    encoder.write(rng.randbytes(4), 10, cls=asn1.Classes.Context)
+    encoder.write(rng.randbytes(4), 11, cls=asn1.Classes.Context)
+    encoder.enter(14, asn1.Classes.Context)
+    for _ in range(extensions):
+        encoder.enter(asn1.Numbers.Sequence)
+        encoder.write(rng.choice(GOST_OIDS), asn1.Numbers.ObjectIdentifier)
+        encoder.write(rng.getrandbits(256), asn1.Numbers.Integer)
+        encoder.write('20301231235959Z', asn1.Numbers.GeneralizedTime)
+        encoder.leave()
+    encoder.leave()
+    encoder.leave()
+    encoder.write(rng.randbytes(4), asn1.Numbers.OctetString)
+    encoder.leave()
+
+
+def header_blob(extensions, seed=0):
+    """A CryptoPro-style header.key with ``extensions`` extension entries."""
+    encoder = asn1.BufferedEncoder()
+    encoder.start()
+    _write_header(encoder, random.Random(seed), extensions)
+    return encoder.output()
+
+
+def integers_blob(count, bits=512, seed=0):
+    rng = random.Random(seed)
+    encoder = asn1.BufferedEncoder()
+    encoder.start()
+    encoder.enter(asn1.Numbers.Sequence)
+    for _ in range(count):
+        encoder.write(rng.getrandbits(bits) - (1 << (bits - 1)), asn1.Numbers.Integer)
+    encoder.leave()
+    return encoder.output()
+
+
+def oids_blob(count, arcs=24, seed=0):
+    rng = random.Random(seed)
+    encoder = asn1.BufferedEncoder()
+    encoder.start()
+    encoder.enter(asn1.Numbers.Sequence)
+    for _ in range(count):
+        oid = "1.2.643." + ".".join(str(rng.getrandbits(rng.choice((7, 14, 28)))) for _ in range(arcs))
+        encoder.write(oid, asn1.Numbers.ObjectIdentifier)
+    encoder.leave()
+    return encoder.output()
+
+
+def nested_blob(depth):
+    blob = b'\x05\x00'
+    for _ in range(depth):
+        length = len(blob)
+        count = max(1, (length.bit_length() + 7) // 8)
+        header = bytes([length]) if length < 128 else bytes([0x80 | count]) + length.to_bytes(count, 'big')
+        blob = b'\x30' + header + blob
+    return blob
+
+
+def count_nodes(blob):
+    return sum(1 for event, _ in asn1.iter_events(blob, max_depth=1 << 20, max_nodes=1 << 30)
+               if event != asn1.END_CONSTRUCTED)
+
+
+def _decoder_walk(blob):
+    decoder = asn1.Decoder()
+    decoder.start(blob)
+    for _ in decoder.walk(1 << 20, 1 << 30):
+        pass
+
+
+def _events(blob):
+    for _ in asn1.iter_events(blob, max_depth=1 << 20, max_nodes=1 << 30):
+        pass
+
+
+def _incremental(blob, chunk_size=4096):
+    chunks = (blob[i:i + chunk_size] for i in range(0, len(blob), chunk_size))
+    for _ in asn1.iter_chunks(chunks, max_depth=1 << 20, max_nodes=1 << 30):
+        pass
+
+
+def _asn1object(blob):
+    return _unbounded(Asn1Object)(blob)
+
+
+def _lazy(blob):
+    return _unbounded(LazyAsn1Object)(blob)
+
+
+def _tree(blob):
+    return Asn1Tree(blob, max_depth=1 << 20, max_nodes=1 << 30)
+
+
+def _pretty_print(blob):
+    decoder = asn1.Decoder()
+    decoder.start(blob)
+    pretty_print(decoder, io.StringIO(), max_depth=1 << 20, max_nodes=1 << 30)
+
+
+_expiry_path = compile_path("0/0/[C:14]/SEQUENCE[0]/GENERALIZEDTIME")
+
+
+def _path(blob):
+    return _expiry_path.value(blob)
+
+
+def _schema(blob):
+    return KEY_HEADER.decode(blob)
+
+
+def _reencode(encoder_type):
+    def encode(blob):
+        encoder = encoder_type()
+        encoder.start()
+        decoder = asn1.Decoder()
+        decoder.start(blob)
+        for event, tag, value in decoder.walk(1 << 20, 1 << 30):
+            if event == asn1.START_CONSTRUCTED:
+                encoder.enter(tag.nr, tag.cls)
+            elif event == asn1.END_CONSTRUCTED:
+                encoder.leave()
+            else:
+                encoder.write(value, tag.nr, tag.typ, tag.cls)
+        return encoder.output()
+    return encode
+
+
+_unbounded_types = {}
+
+
+def _unbounded(node_type):
+    if node_type not in _unbounded_types:
+        _unbounded_types[node_type] = type(node_type.__name__, (node_type,),
+                                           {"__slots__": (), "max_depth": 1 << 20, "max_nodes": 1 << 30})
+    return _unbounded_types[node_type]
+
+
+ENGINES = {
+    "decoder.walk": _decoder_walk,
+    "events": _events,
+    "incremental": _incremental,
+    "asn1object": _asn1object,
+    "lazy": _lazy,
+    "tree": _tree,
+    "pretty_print": _pretty_print,
+    "encoder": _reencode(asn1.Encoder),
+    "buffered_encoder": _reencode(asn1.BufferedEncoder),
+}
+
+
+# Lazy objects are only constructed, so they are counted per object rather
+# than per node they could decode.
+UNITS = {
+    "lazy": "objects",
+    "path": "lookups",
+}
+
+
+def inputs():
+    return {
+        "header-small": header_blob(4),
+        "header-large": header_blob(2000),
+        "integers": integers_blob(2000),
+        "oids": oids_blob(2000),
+        "nested": nested_blob(500),
+    }
+
+
+def cases():
+    for input_name, blob in inputs().items():
+        for engine_name, engine in ENGINES.items():
+            if input_name == "nested" and engine_name in ("encoder", "buffered_encoder"):
+                continue
+            yield f"{engine_name}/{input_name}", engine, blob, UNITS.get(engine_name, "nodes")
+        if input_name.startswith("header"):
+            yield f"path/{input_name}", _path, blob, UNITS["path"]
+            yield f"schema/{input_name}", _schema, blob, "nodes"
+
+
+def measure(engine, blob, min_time):
+    engine(blob)
+    runs = 0
+    best = float("inf")
+    started = time.perf_counter()
+    while runs < 3 or time.perf_counter() - started < min_time:
+        start = time.perf_counter()
+        engine(blob)
+        best = min(best, time.perf_counter() - start)
+        runs += 1
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = engine(blob)
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    ignore = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "filename")
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    return best, peak, blocks
+
+
+def run(min_time, selected=None):
+    results = {}
+    for name, engine, blob, unit in cases():
+        if selected and not any(name.startswith(prefix) for prefix in selected):
+            continue
+        seconds, peak, blocks = measure(engine, blob, min_time)
+        count = count_nodes(blob) if unit == "nodes" else 1
+        results[name] = {
+            "seconds": seconds,
+            "unit": unit,
+            "per_second": count / seconds,
+            "mb_per_second": len(blob) / seconds / 1e6,
+            "peak_bytes": peak,
+            "retained_blocks": blocks,
+        }
+        print(f"{name:32} {count / seconds:14,.0f} {unit + '/s':9} {len(blob) / seconds / 1e6:9.2f} MB/s "
+              f"{peak / 1024:10,.0f} KiB peak {blocks:9,} retained blocks")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None or expected.get("unit") != result["unit"]:
+            continue
+        if result["per_second"] < expected["per_second"] * (1 - tolerance):
+            failures.append(f"{name}: {result['per_second']:,.0f} {result['unit']}/s, "
+                            f"baseline {expected['per_second']:,.0f}")
+        if result["peak_bytes"] > expected["peak_bytes"] * (1 + tolerance):
+            failures.append(f"{name}: {result['peak_bytes']:,} bytes peak, baseline {expected['peak_bytes']:,}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ASN.1 engines.")
+    parser.add_argument("cases", nargs="*", help="only run cases starting with these prefixes")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds to time each case")
+    args = parser.parse_args()
+    results = run(args.min_time, args.cases)
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+        return 0
+    if not args.check:
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline first.")
+        return 1
+    with open(args.baseline) as file:
+        failures = compare(results, json.load(file), args.tolerance)
+    for failure in failures:
+        print("REGRESSION", failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
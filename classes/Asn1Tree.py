@@ -0,0 +1,211 @@
+from array import array
+
+from classes.Asn1Object import Asn1Object
+from modules.asn1 import Types, Tag, Walker, open_source, START_CONSTRUCTED, END_CONSTRUCTED
+from modules.asn1 import DEFAULT_MAX_DEPTH, DEFAULT_MAX_NODES, DEFAULT_ENCODING
+from modules.asn1 import encapsulated_start, encapsulated_tag_prefixes
+
+
+class Asn1Tree:
+    def __init__(self, data, encoding=DEFAULT_ENCODING, max_depth=DEFAULT_MAX_DEPTH, max_nodes=DEFAULT_MAX_NODES,
+                 prefixes=encapsulated_tag_prefixes):
+        self.buffer = open_source(data)
+        self.encoding = encoding
+        self.nr = array('L')
+        self.large_nr = {}
+        self.typ = array('B')
+        self.cls = array('B')
+        self.offset = array('Q')
+        self.header_length = array('L')
+        self.length = array('Q')
+        self.indefinite = array('B')
+        self.depth = array('H')
+        self.parent = array('l')
+        self.first_child = array('l')
+        self.next_sibling = array('l')
+        self._build(max_depth, max_nodes, prefixes)
+
+    def _build(self, max_depth, max_nodes, prefixes):
+        buffer = self.buffer
+
+        def descend(node):
+            start = node.offset + node.header_length
+            return encapsulated_start(buffer, node.tag, start, start + node.length, prefixes)
+
+        parents = [-1]
+        last_children = [-1]
+        encapsulating = []
+        walker = Walker(buffer, 0, len(buffer), max_depth, max_nodes, descend)
+        for event, node in walker:
+            if event == END_CONSTRUCTED:
+                if node.indefinite:
+                    self.length[parents[-1]] = node.length
+                if encapsulating and encapsulating[-1] == len(parents) - 1:
+                    del encapsulating[-1]
+                del parents[-1]
+                del last_children[-1]
+                continue
+            index = len(self.nr)
+            parent = parents[-1]
+            try:
+                self.nr.append(node.tag.nr)
+            except OverflowError:
+                self.large_nr[index] = node.tag.nr
+                self.nr.append(0)
+            self.typ.append(node.tag.typ)
+            self.cls.append(node.tag.cls)
+            self.offset.append(node.offset)
+            self.header_length.append(node.header_length)
+            self.length.append(node.length or 0)
+            self.indefinite.append(node.indefinite)
+            self.depth.append(node.depth)
+            self.parent.append(parent)
+            self.first_child.append(-1)
+            self.next_sibling.append(-1)
+            if last_children[-1] >= 0:
+                self.next_sibling[last_children[-1]] = index
+            elif parent >= 0:
+                self.first_child[parent] = index
+            last_children[-1] = index
+            if event == START_CONSTRUCTED:
+                parents.append(index)
+                last_children.append(-1)
+                if node.tag.typ == Types.Primitive:
+                    encapsulating.append(len(parents) - 1)
+                continue
+            if not encapsulating:
+                continue
+            try:
+                Asn1NodeView(self, index)._primitive_value()
+            except Exception:
+                level = self._fall_back(parents, encapsulating)
+                if level is None:
+                    raise
+                walker.abandon(level - 1)
+                del parents[level:]
+                del last_children[level:]
+
+    def _fall_back(self, parents, encapsulating):
+        while encapsulating:
+            level = encapsulating.pop()
+            index = parents[level]
+            self.first_child[index] = -1
+            try:
+                Asn1NodeView(self, index)._primitive_value()
+            except Exception:
+                continue
+            self._truncate(index + 1)
+            return level
+        return None
+
+    def _truncate(self, count):
+        for column in (self.nr, self.typ, self.cls, self.offset, self.header_length, self.length,
+                       self.indefinite, self.depth, self.parent, self.first_child, self.next_sibling):
+            del column[count:]
+        for index in [index for index in self.large_nr if index >= count]:
+            del self.large_nr[index]
+
+    def __len__(self):
+        return len(self.nr)
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self.nr):
+            raise IndexError('node index out of range')
+        return Asn1NodeView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.nr)):
+            yield Asn1NodeView(self, index)
+
+    @property
+    def root(self):
+        return self[0]
+
+    def roots(self):
+        index = 0 if len(self.nr) else -1
+        while index >= 0:
+            yield Asn1NodeView(self, index)
+            index = self.next_sibling[index]
+
+    def __repr__(self):
+        return "".join(repr(node) for node in self.roots())
+
+
+class Asn1NodeView(Asn1Object):
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, Asn1NodeView) and self.tree is other.tree and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    @property
+    def tag(self):
+        tree = self.tree
+        index = self.index
+        nr = tree.nr[index]
+        if tree.large_nr:
+            nr = tree.large_nr.get(index, nr)
+        return Tag(nr=nr, typ=tree.typ[index], cls=tree.cls[index])
+
+    @property
+    def intent(self):
+        return self.tree.depth[self.index]
+
+    @property
+    def encoding(self):
+        return self.tree.encoding
+
+    @property
+    def buffer(self):
+        return self.tree.buffer
+
+    @property
+    def offset(self):
+        return self.tree.offset[self.index]
+
+    @property
+    def header_length(self):
+        return self.tree.header_length[self.index]
+
+    @property
+    def length(self):
+        return self.tree.length[self.index]
+
+    @property
+    def indefinite(self):
+        return bool(self.tree.indefinite[self.index])
+
+    @property
+    def parent(self):
+        parent = self.tree.parent[self.index]
+        if parent < 0:
+            return None
+        return Asn1NodeView(self.tree, parent)
+
+    @property
+    def end(self):
+        parent = self.parent
+        if parent is None:
+            return len(self.tree.buffer)
+        return parent.content_end
+
+    @property
+    def children(self):
+        children = []
+        index = self.tree.first_child[self.index]
+        while index >= 0:
+            children.append(Asn1NodeView(self.tree, index))
+            index = self.tree.next_sibling[index]
+        return children
+
+    @property
+    def repr_value(self):
+        if self.tree.typ[self.index] == Types.Constructed or self.tree.first_child[self.index] >= 0:
+            raise AttributeError("'Asn1NodeView' object has no attribute 'repr_value'")
+        return self._primitive_value()
@@ -0,0 +1,59 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncContainerSource:
+    async_workers = 8
+    _executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.async_workers,
+                                                thread_name_prefix=type(self).__name__)
+        return self._executor
+
+    def _shutdown_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), function, *args)
+
+    async def acontainers(self):
+        for name in await self._run(list, self.containers()):
+            yield name
+
+    async def aget_container(self, name, parts=None, lazy=False):
+        return await self._run(self.get_container, name, parts, lazy)
+
+    async def aget_containers(self, names=None, in_flight=None, parts=None):
+        if names is None:
+            names = [name async for name in self.acontainers()]
+        if in_flight is None:
+            in_flight = self.async_workers
+        names = iter(names)
+        pending = {}
+
+        def submit():
+            for name in names:
+                pending[asyncio.ensure_future(self.aget_container(name, parts))] = name
+                return True
+            return False
+
+        try:
+            while len(pending) < in_flight and submit():
+                pass
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = pending.pop(task)
+                    submit()
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = e
+                    yield name, result
+        finally:
+            for task in pending:
+                task.cancel()
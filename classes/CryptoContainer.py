@@ -1,7 +1,68 @@
+KEY_FILES = (
+    ("key_header", "header.key"),
+    ("key_masks", "masks.key"),
+    ("key_masks2", "masks2.key"),
+    ("key_name", "name.key"),
+    ("key_primary", "primary.key"),
+    ("key_primary2", "primary2.key"),
+)
+
+key_file_names = dict(KEY_FILES)
+
+
+def select_parts(parts=None, lazy=False):
+    if parts is None:
+        if lazy:
+            return ()
+        return tuple(key_file_names)
+    parts = tuple(parts)
+    for part in parts:
+        if part not in key_file_names:
+            raise ValueError(f'Unknown container part: {part}')
+    return parts
+
+
 class CryptoContainer:
-    def __init__(self, name, place):
+    def __init__(self, name, place, loader=None):
         self.name = name
         self.place = place
+        self.mappings = []
+        self.loader = loader
 
     def __repr__(self):
         return f"{self.name} ({self.place})"
+
+    def __getattr__(self, attribute):
+        loader = self.__dict__.get("loader")
+        if loader is None or attribute not in key_file_names:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{attribute}'")
+        value = loader(self, attribute)
+        setattr(self, attribute, value)
+        return value
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # Key parts may be views into memory-mapped files, so neither the parts nor
+    # slices taken from them may be used after close(). A mapping that still has
+    # such a slice alive is left for the garbage collector to unmap.
+    def close(self):
+        self.loader = None
+        mappings, self.mappings = self.mappings, []
+        try:
+            for attribute, _ in KEY_FILES:
+                value = self.__dict__.get(attribute)
+                if isinstance(value, memoryview):
+                    try:
+                        value.release()
+                    except BufferError:
+                        pass
+        finally:
+            for mapping in mappings:
+                try:
+                    mapping.close()
+                except BufferError:
+                    pass
@@ -0,0 +1,67 @@
+import mmap
+import os
+
+from classes.AsyncContainerSource import AsyncContainerSource
+from classes.CryptoContainer import CryptoContainer, key_file_names, select_parts
+
+CRYPTO_PRO_KEYS = '/var/opt/cprocsp/keys'
+
+
+class CryptoProDirectory(AsyncContainerSource):
+    def __init__(self, keypath=None):
+        if keypath is None:
+            keypath = os.path.join(CRYPTO_PRO_KEYS, os.environ.get('USER', ''))
+        if not os.path.isdir(keypath):
+            raise Exception(f'Container directory not found: {keypath}')
+        self.keypath = keypath
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._shutdown_executor()
+
+    def containers(self):
+        for path in self.scan():
+            yield os.path.relpath(path, self.keypath)
+
+    def scan(self):
+        stack = [self.keypath]
+        while stack:
+            path = stack.pop()
+            if os.path.isfile(os.path.join(path, "header.key")):
+                yield path
+                continue
+            try:
+                entries = sorted(entry.path for entry in os.scandir(path) if entry.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+            stack.extend(reversed(entries))
+
+    def get_container(self, name, parts=None, lazy=False):
+        path = os.path.join(self.keypath, name)
+
+        def load(container, attribute):
+            return self._map(container, os.path.join(path, key_file_names[attribute]))
+
+        container = CryptoContainer(name, "directory", load if lazy else None)
+        try:
+            for attribute in select_parts(parts, lazy):
+                setattr(container, attribute, load(container, attribute))
+        except:
+            container.close()
+            raise
+        return container
+
+    @staticmethod
+    def _map(container, filename):
+        with open(filename, "rb") as file:
+            try:
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return memoryview(b'')
+        container.mappings.append(mapping)
+        return memoryview(mapping)
@@ -1,46 +1,58 @@
-from winreg import ConnectRegistry, OpenKey, EnumKey, QueryValueEx
-from winreg import HKEY_LOCAL_MACHINE
-
-from classes.CryptoContainer import CryptoContainer
+from classes.AsyncContainerSource import AsyncContainerSource
+from classes.CryptoContainer import CryptoContainer, KEY_FILES, key_file_names, select_parts
+from classes.RegistryBackend import WinRegBackend
 
 CRYPTO_PRO_64 = 'SOFTWARE\\WOW6432Node\\Crypto Pro\\'
 CRYPTO_PRO_32 = 'SOFTWARE\\Crypto Pro\\'
 
 
-class CryptoProRegistry:
-    def __init__(self, sid):
-        self.keypath = f'HKEY_LOCAL_MACHINE\\SOFTWARE\\WOW6432Node\\Crypto Pro\\Settings\\Users\\{sid}\\Keys'
-        reg = ConnectRegistry(None, HKEY_LOCAL_MACHINE)
-        try:
-            _ = OpenKey(reg, f'{CRYPTO_PRO_64}')
+class CryptoProRegistry(AsyncContainerSource):
+    def __init__(self, sid, backend=None):
+        if backend is None:
+            backend = WinRegBackend()
+        self.backend = backend
+        if backend.has_key(CRYPTO_PRO_64):
             self.keypath = f'{CRYPTO_PRO_64}Settings\\Users\\{sid}\\Keys\\'
-        except:
-            try:
-                _ = OpenKey(reg, f'{CRYPTO_PRO_32}')
-                self.keypath = f'{CRYPTO_PRO_32}Settings\\Users\\{sid}\\Keys\\'
-            except:
-                raise Exception('CryptoPro not installed')
+        elif backend.has_key(CRYPTO_PRO_32):
+            self.keypath = f'{CRYPTO_PRO_32}Settings\\Users\\{sid}\\Keys\\'
+        else:
+            raise Exception('CryptoPro not installed')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._shutdown_executor()
+        self.backend.close()
 
     def containers(self):
-        reg = ConnectRegistry(None, HKEY_LOCAL_MACHINE)
-        key = OpenKey(reg, self.keypath)
-        counter = 0
-        while True:
+        yield from self.backend.enum_keys(self.keypath)
+
+    def get_container(self, name, parts=None, lazy=False):
+        path = f"{self.keypath}{name}"
+
+        def load(container, attribute):
             try:
-                subkey = EnumKey(key, counter)
-                counter += 1
-                yield subkey
-            except WindowsError as e:
-                break
-
-    def get_container(self, name):
-        reg = ConnectRegistry(None, HKEY_LOCAL_MACHINE)
-        key = OpenKey(reg, f"{self.keypath}{name}")
-        container = CryptoContainer(name, "registry")
-        container.key_header, _ = QueryValueEx(key, "header.key")
-        container.key_masks, _ = QueryValueEx(key, "masks.key")
-        container.key_masks2, _ = QueryValueEx(key, "masks2.key")
-        container.key_name, _ = QueryValueEx(key, "name.key")
-        container.key_primary, _ = QueryValueEx(key, "primary.key")
-        container.key_primary2, _ = QueryValueEx(key, "primary2.key")
+                return self.backend.query_value(path, key_file_names[attribute])
+            finally:
+                self.backend.close_key(path)
+
+        attributes = select_parts(parts, lazy)
+        container = CryptoContainer(name, "registry", load if lazy else None)
+        if len(attributes) < len(KEY_FILES):
+            for attribute in attributes:
+                setattr(container, attribute, load(container, attribute))
+            return container
+        try:
+            values = self.backend.enum_values(path)
+        finally:
+            self.backend.close_key(path)
+        for attribute in attributes:
+            file_name = key_file_names[attribute]
+            if file_name not in values:
+                raise FileNotFoundError(f'Registry value not found: {path}\\{file_name}')
+            setattr(container, attribute, values[file_name])
         return container
@@ -0,0 +1,40 @@
+from classes.Asn1Object import Asn1Object, Types, DEFAULT_ENCODING
+
+
+class LazyAsn1Object(Asn1Object):
+    __slots__ = ('_children', '_repr_value', '_expanded')
+
+    def __init__(self, data, intent=0, encoding=DEFAULT_ENCODING, offset=0, end=None):
+        self._read_header(data, intent, encoding, offset, end)
+        self._expanded = False
+
+    def _expand(self):
+        self._expanded = True
+        if self.tag.typ == Types.Constructed:
+            self.children = []
+            self._read_children(type(self), self.content_offset, self.content_end)
+        else:
+            self._build(Asn1Object)
+
+    @property
+    def children(self):
+        if not self._expanded:
+            self._expand()
+        return self._children
+
+    @children.setter
+    def children(self, children):
+        self._children = children
+
+    @property
+    def repr_value(self):
+        if not self._expanded:
+            self._expand()
+        try:
+            return self._repr_value
+        except AttributeError:
+            raise AttributeError("'LazyAsn1Object' object has no attribute 'repr_value'") from None
+
+    @repr_value.setter
+    def repr_value(self, repr_value):
+        self._repr_value = repr_value
@@ -0,0 +1,165 @@
+import codecs
+import threading
+
+
+class WinRegBackend:
+    def __init__(self):
+        import winreg
+        self.winreg = winreg
+        self.connection = winreg.ConnectRegistry(None, winreg.HKEY_LOCAL_MACHINE)
+        self.keys = {}
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open_key(self, path):
+        with self.lock:
+            key = self.keys.get(path)
+            if key is None:
+                key = self.winreg.OpenKey(self.connection, path)
+                self.keys[path] = key
+        return key
+
+    def close_key(self, path):
+        with self.lock:
+            key = self.keys.pop(path, None)
+        if key is not None:
+            key.Close()
+
+    def has_key(self, path):
+        try:
+            self.open_key(path)
+            return True
+        except OSError:
+            return False
+
+    def enum_keys(self, path):
+        key = self.open_key(path)
+        counter = 0
+        while True:
+            try:
+                subkey = self.winreg.EnumKey(key, counter)
+            except OSError:
+                break
+            counter += 1
+            yield subkey
+
+    def enum_values(self, path):
+        key = self.open_key(path)
+        _, count, _ = self.winreg.QueryInfoKey(key)
+        values = {}
+        for index in range(count):
+            name, data, _ = self.winreg.EnumValue(key, index)
+            values[name] = data
+        return values
+
+    def query_value(self, path, name):
+        key = self.open_key(path)
+        value, _ = self.winreg.QueryValueEx(key, name)
+        return value
+
+    def close(self):
+        with self.lock:
+            keys, self.keys = self.keys, {}
+        for key in keys.values():
+            key.Close()
+        if self.connection is not None:
+            self.connection.Close()
+            self.connection = None
+
+
+class DictBackend:
+    ROOT = "HKEY_LOCAL_MACHINE\\"
+
+    def __init__(self, tree):
+        self.tree = {}
+        for path, values in tree.items():
+            self.tree[self._normalize(path)] = (path.strip("\\"), dict(values))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @classmethod
+    def from_reg_file(cls, filename):
+        with open(filename, "rb") as file:
+            data = file.read()
+        if data.startswith(codecs.BOM_UTF16_LE):
+            text = data.decode("utf-16")
+        else:
+            text = data.decode("utf-8-sig")
+        return cls(cls._parse_reg(text))
+
+    @classmethod
+    def _parse_reg(cls, text):
+        tree = {}
+        values = None
+        lines = iter(text.splitlines())
+        for line in lines:
+            line = line.strip()
+            while line.endswith("\\") and not line.startswith("["):
+                line = line[:-1] + next(lines, "").strip()
+            if line.startswith("[") and line.endswith("]"):
+                path = line[1:-1]
+                if path.upper().startswith(cls.ROOT):
+                    path = path[len(cls.ROOT):]
+                values = tree.setdefault(path, {})
+            elif line.startswith('"') and values is not None:
+                name, data = cls._parse_reg_value(line)
+                values[name] = data
+        return tree
+
+    @staticmethod
+    def _parse_reg_value(line):
+        end = line.index('"=', 1)
+        name = line[1:end].replace('\\\\', '\\').replace('\\"', '"')
+        data = line[end + 2:]
+        if data.startswith('"'):
+            return name, data[1:-1].replace('\\\\', '\\').replace('\\"', '"')
+        if data.startswith("dword:"):
+            return name, int(data[6:], 16)
+        if data.startswith("hex"):
+            return name, bytes.fromhex(data.split(":", 1)[1].replace(",", ""))
+        raise Exception(f'Unsupported registry value: {line}')
+
+    @staticmethod
+    def _normalize(path):
+        return path.strip("\\").lower()
+
+    def has_key(self, path):
+        path = self._normalize(path)
+        return any(key == path or key.startswith(path + "\\") for key in self.tree)
+
+    def enum_keys(self, path):
+        path = self._normalize(path) + "\\"
+        seen = set()
+        for key, (name, _) in self.tree.items():
+            if key.startswith(path):
+                subkey = name[len(path):].split("\\", 1)[0]
+                if subkey.lower() not in seen:
+                    seen.add(subkey.lower())
+                    yield subkey
+
+    def enum_values(self, path):
+        try:
+            return dict(self.tree[self._normalize(path)][1])
+        except KeyError:
+            raise FileNotFoundError(f'Registry key not found: {path}') from None
+
+    def query_value(self, path, name):
+        values = self.enum_values(path)
+        if name not in values:
+            raise FileNotFoundError(f'Registry value not found: {path}\\{name}')
+        return values[name]
+
+    def close_key(self, path):
+        pass
+
+    def close(self):
+        pass
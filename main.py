@@ -12,7 +12,7 @@ def main():
     print("Container list:")
     for container_name in cryptopro.containers():
         if container_name == "Samara2021":
-            container = cryptopro.get_container(container_name)
+            container = cryptopro.get_container(container_name, parts=("key_header",))
             print_keyfile(container.key_header)
             asn1 = Asn1Object(container.key_header)
             print(asn1)
@@ -1,29 +1,13 @@
 import binascii
+import csv
+import json
 import sys
 import modules.asn1 as asn1
+import modules.GostOids
 
-tag_id_to_string_map = {
-    asn1.Numbers.Boolean: "BOOLEAN",
-    asn1.Numbers.Integer: "INTEGER",
-    asn1.Numbers.BitString: "BIT STRING",
-    asn1.Numbers.OctetString: "OCTET STRING",
-    asn1.Numbers.Null: "NULL",
-    asn1.Numbers.ObjectIdentifier: "OBJECT",
-    asn1.Numbers.PrintableString: "PRINTABLESTRING",
-    asn1.Numbers.IA5String: "IA5STRING",
-    asn1.Numbers.UTCTime: "UTCTIME",
-    asn1.Numbers.GeneralizedTime: "GENERALIZED TIME",
-    asn1.Numbers.Enumerated: "ENUMERATED",
-    asn1.Numbers.Sequence: "SEQUENCE",
-    asn1.Numbers.Set: "SET"
-}
+tag_id_to_string_map = asn1.tag_to_string_map
 
-class_id_to_string_map = {
-    asn1.Classes.Universal: "U",
-    asn1.Classes.Application: "A",
-    asn1.Classes.Context: "C",
-    asn1.Classes.Private: "P"
-}
+class_id_to_string_map = asn1.cls_to_string_map
 
 object_id_to_string_map = {
     "1.2.643.2.2.36.0": "cryptopro-XchA",
@@ -34,24 +18,21 @@ object_id_to_string_map = {
 }
 
 
-def tag_id_to_string(identifier):
-    """Return a string representation of a ASN.1 id."""
-    if identifier in tag_id_to_string_map:
-        return tag_id_to_string_map[identifier]
-    return '{:#02x}'.format(identifier)
-
+tag_id_to_string = asn1.tag_to_string
 
-def class_id_to_string(identifier):
-    """Return a string representation of an ASN.1 class."""
-    if identifier in class_id_to_string_map:
-        return class_id_to_string_map[identifier]
-    raise ValueError('Illegal class: {:#02x}'.format(identifier))
+class_id_to_string = asn1.cls_to_string
 
 
+# The legacy names above only apply to this module's output; they are looked
+# up here instead of being registered in the shared asn1.oids registry.
 def object_identifier_to_string(identifier):
-    if identifier in object_id_to_string_map:
-        return object_id_to_string_map[identifier]
-    return identifier
+    name = object_id_to_string_map.get(identifier)
+    if name is not None:
+        return name
+    name = getattr(identifier, "name", None)
+    if name is not None:
+        return name
+    return asn1.oids.name(identifier)
 
 
 def value_to_string(tag_number, value):
@@ -66,25 +47,172 @@ def value_to_string(tag_number, value):
         return repr(value)
 
 
-def pretty_print(input_stream, output_stream, indent=0):
-    while not input_stream.eof():
-        tag = input_stream.peek()
-        tag_name = tag_id_to_string(tag.nr)
-        tag_class = class_id_to_string(tag.cls)
-        if tag.typ == asn1.Types.Primitive:
-            tag, value = input_stream.read()
-            output_stream.write(' ' * indent)
-            output_stream.write('[{}] {}: {}\n'.format(tag_class, tag_name, value_to_string(tag.nr, value)))
-        elif tag.typ == asn1.Types.Constructed:
-            output_stream.write(' ' * indent)
-            output_stream.write('[{}] {}\n'.format(tag_class, tag_name))
-            input_stream.enter()
-            pretty_print(input_stream, output_stream, indent + 2)
-            input_stream.leave()
-
-
-def print_keyfile(binary):
-    decoder = asn1.Decoder()
-    decoder.start(binary)
-    output_file = sys.stdout
-    pretty_print(decoder, output_file)
+BUFFER_SIZE = 1 << 16
+
+
+class Renderer:
+    def __init__(self, output_stream, indent=0, buffer_size=BUFFER_SIZE):
+        self.output_stream = output_stream
+        self.indent = indent
+        self.buffer_size = buffer_size
+        self.source = None
+        self.m_parts = []
+        self.m_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def begin(self, source):
+        self.source = source
+
+    def write(self, text):
+        self.m_parts.append(text)
+        self.m_size += len(text)
+        if self.m_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.m_parts:
+            self.output_stream.write(''.join(self.m_parts))
+            self.m_parts = []
+            self.m_size = 0
+
+    def start_constructed(self, depth, tag):
+        raise NotImplementedError
+
+    def primitive(self, depth, tag, value):
+        raise NotImplementedError
+
+    def end_constructed(self, depth, tag):
+        pass
+
+
+class TextRenderer(Renderer):
+    def __init__(self, output_stream, indent=0, buffer_size=BUFFER_SIZE):
+        super().__init__(output_stream, indent, buffer_size)
+        self.m_indents = []
+
+    def begin(self, source):
+        super().begin(source)
+        self.write(f'{source}\n')
+
+    def _indent(self, depth):
+        indents = self.m_indents
+        while len(indents) <= depth:
+            indents.append(' ' * (self.indent + 2 * len(indents)))
+        return indents[depth]
+
+    def start_constructed(self, depth, tag):
+        self.write(f'{self._indent(depth)}[{class_id_to_string(tag.cls)}] {tag_id_to_string(tag.nr)}\n')
+
+    def primitive(self, depth, tag, value):
+        self.write(f'{self._indent(depth)}[{class_id_to_string(tag.cls)}] {tag_id_to_string(tag.nr)}: '
+                   f'{value_to_string(tag.nr, value)}\n')
+
+
+def value_to_data(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if value is None or isinstance(value, (bool, int)):
+        return value
+    return str(value)
+
+
+def _record(source, depth, tag, value, constructed):
+    name = None
+    if tag.cls == asn1.Classes.Universal and tag.nr == asn1.Numbers.ObjectIdentifier:
+        name = object_identifier_to_string(value)
+        if name == value:
+            name = None
+    return {
+        "source": source,
+        "depth": depth,
+        "class": class_id_to_string(tag.cls),
+        "tag": tag_id_to_string(tag.nr),
+        "constructed": constructed,
+        "value": None if constructed else value_to_data(value),
+        "name": name,
+    }
+
+
+class JsonLinesRenderer(Renderer):
+    def start_constructed(self, depth, tag):
+        self.write(json.dumps(_record(self.source, depth, tag, None, True), ensure_ascii=False) + '\n')
+
+    def primitive(self, depth, tag, value):
+        self.write(json.dumps(_record(self.source, depth, tag, value, False), ensure_ascii=False) + '\n')
+
+
+class CsvRenderer(Renderer):
+    columns = ("source", "depth", "class", "tag", "value", "name")
+
+    def __init__(self, output_stream, indent=0, buffer_size=BUFFER_SIZE, header=True):
+        super().__init__(output_stream, indent, buffer_size)
+        self.m_writer = csv.writer(self, lineterminator='\n')
+        if header:
+            self.m_writer.writerow(self.columns)
+
+    def _row(self, record):
+        value = record["value"]
+        if record["constructed"]:
+            value = ""
+        self.m_writer.writerow((record["source"], record["depth"], record["class"], record["tag"], value,
+                                record["name"] or ""))
+
+    def start_constructed(self, depth, tag):
+        self._row(_record(self.source, depth, tag, None, True))
+
+    def primitive(self, depth, tag, value):
+        self._row(_record(self.source, depth, tag, value, False))
+
+
+renderers = {
+    "text": TextRenderer,
+    "jsonl": JsonLinesRenderer,
+    "csv": CsvRenderer,
+}
+
+
+def get_renderer(fmt, output_stream, **kwargs):
+    if fmt not in renderers:
+        raise ValueError(f'Unknown output format: {fmt}')
+    return renderers[fmt](output_stream, **kwargs)
+
+
+def pretty_print(input_stream, output_stream, indent=0,
+                 max_depth=asn1.DEFAULT_MAX_DEPTH, max_nodes=asn1.DEFAULT_MAX_NODES, renderer=None):
+    own_renderer = renderer is None
+    if own_renderer:
+        renderer = TextRenderer(output_stream, indent)
+    depth = 0
+    for event, tag, value in input_stream.walk(max_depth, max_nodes):
+        if event == asn1.PRIMITIVE:
+            renderer.primitive(depth, tag, value)
+        elif event == asn1.START_CONSTRUCTED:
+            renderer.start_constructed(depth, tag)
+            depth += 1
+        else:
+            depth -= 1
+            renderer.end_constructed(depth, tag)
+    if own_renderer:
+        renderer.flush()
+
+
+def print_keyfile(binary, output_stream=None, fmt="text"):
+    if output_stream is None:
+        output_stream = sys.stdout
+    with asn1.decoders.decoder(binary) as decoder, get_renderer(fmt, output_stream) as renderer:
+        pretty_print(decoder, output_stream, renderer=renderer)
+
+
+def print_keyfiles(keyfiles, output_stream=None, fmt="text"):
+    if output_stream is None:
+        output_stream = sys.stdout
+    with asn1.decoders.decoder() as decoder, get_renderer(fmt, output_stream) as renderer:
+        for source, binary in keyfiles:
+            renderer.begin(source)
+            decoder.start(binary)
+            pretty_print(decoder, output_stream, renderer=renderer)
@@ -0,0 +1,122 @@
+import re
+
+import modules.asn1 as asn1
+from modules.asn1 import encapsulated_start
+
+tag_name_to_number_map = {
+    "BOOLEAN": asn1.Numbers.Boolean,
+    "INTEGER": asn1.Numbers.Integer,
+    "BITSTRING": asn1.Numbers.BitString,
+    "OCTETSTRING": asn1.Numbers.OctetString,
+    "NULL": asn1.Numbers.Null,
+    "OBJECT": asn1.Numbers.ObjectIdentifier,
+    "OID": asn1.Numbers.ObjectIdentifier,
+    "ENUMERATED": asn1.Numbers.Enumerated,
+    "UTF8STRING": asn1.Numbers.UTF8String,
+    "SEQUENCE": asn1.Numbers.Sequence,
+    "SET": asn1.Numbers.Set,
+    "PRINTABLESTRING": asn1.Numbers.PrintableString,
+    "IA5STRING": asn1.Numbers.IA5String,
+    "UTCTIME": asn1.Numbers.UTCTime,
+    "GENERALIZEDTIME": asn1.Numbers.GeneralizedTime,
+    "UNICODESTRING": asn1.Numbers.UnicodeString,
+}
+
+class_letter_to_class_map = {
+    "U": asn1.Classes.Universal,
+    "A": asn1.Classes.Application,
+    "C": asn1.Classes.Context,
+    "P": asn1.Classes.Private,
+}
+
+_segment_re = re.compile(r'^(?:(?P<position>\d+)|(?P<any>\*)|(?P<name>[A-Za-z_][A-Za-z0-9_ ]*)'
+                         r'|\[(?P<cls>[UACPuacp]):(?P<nr>\d+)\])(?:\[(?P<index>\d+)\])?$')
+
+
+class AsnPath:
+    def __init__(self, path):
+        self.path = path
+        self.steps = [self._compile_segment(segment) for segment in re.split(r'[/.]', path.strip('/.'))]
+
+    def __repr__(self):
+        return f"AsnPath({self.path!r})"
+
+    @staticmethod
+    def _compile_segment(segment):
+        match = _segment_re.match(segment.strip())
+        if match is None:
+            raise ValueError(f'Illegal path segment: {segment!r}')
+        index = int(match.group("index") or 0)
+        if match.group("position") is not None:
+            return None, None, int(match.group("position")) + index
+        if match.group("any") is not None:
+            return None, None, index
+        if match.group("name") is not None:
+            name = match.group("name").upper().replace(" ", "").replace("_", "")
+            if name not in tag_name_to_number_map:
+                raise ValueError(f'Unknown tag name: {match.group("name")!r}')
+            return asn1.Classes.Universal, tag_name_to_number_map[name], index
+        return class_letter_to_class_map[match.group("cls").upper()], int(match.group("nr")), index
+
+    def find(self, data, offset=0, end=None):
+        data = asn1.open_source(data)
+        if end is None:
+            end = len(data)
+        node = None
+        for depth, (cls, nr, index) in enumerate(self.steps):
+            if node is not None:
+                offset = node.offset + node.header_length
+                end = node.content_end
+                if node.tag.typ == asn1.Types.Primitive:
+                    offset = encapsulated_start(data, node.tag, offset, end)
+                    if offset is None:
+                        return None
+            node = self._find_child(data, offset, end, depth, cls, nr, index)
+            if node is None:
+                return None
+        return node
+
+    @staticmethod
+    def _find_child(data, offset, end, depth, cls, nr, index):
+        while offset < end:
+            tag, content, length = asn1.read_header(data, offset, end)
+            indefinite = length is None
+            if indefinite:
+                length = asn1.end_of_contents(data, content, end) - content
+            if (cls is None or tag.cls == cls) and (nr is None or tag.nr == nr):
+                if index == 0:
+                    return asn1.Node(tag, offset, content - offset, length, depth, indefinite)
+                index -= 1
+            offset = content + length
+        return None
+
+    def value(self, data, offset=0, end=None):
+        data = asn1.open_source(data)
+        node = self.find(data, offset, end)
+        if node is None:
+            return None
+        start = node.offset + node.header_length
+        bytes_data = bytes(data[start:node.content_end])
+        if node.tag.typ == asn1.Types.Constructed:
+            return bytes_data
+        return _value_decoder._decode_value(node.tag.cls, node.tag.nr, bytes_data)
+
+
+_value_decoder = asn1.Decoder()
+
+_compiled_paths = {}
+
+
+def compile_path(path):
+    compiled = _compiled_paths.get(path)
+    if compiled is None:
+        compiled = _compiled_paths[path] = AsnPath(path)
+    return compiled
+
+
+def find(data, path):
+    return compile_path(path).find(data)
+
+
+def find_value(data, path):
+    return compile_path(path).value(data)
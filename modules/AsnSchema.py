@@ -0,0 +1,170 @@
+import copy
+import dataclasses
+import functools
+
+import modules.asn1 as asn1
+from modules.asn1 import Classes, Error, Numbers, Tag, Types, DEFAULT_ENCODING, read_header
+
+
+def _read_header(data, offset, end):
+    tag, content, length = read_header(data, offset, end)
+    if length is None:
+        raise Error('Indefinite length is not supported by schema decoders.')
+    return tag, content, content + length
+
+
+class Schema:
+    tag = None
+
+    def read(self, data, offset, start, stop):
+        raise NotImplementedError
+
+    def implicit(self, nr, cls=Classes.Context):
+        schema = copy.copy(self)
+        schema.tag = Tag(nr=nr, typ=self.typ, cls=cls)
+        return schema
+
+    def decode(self, data, offset=0, end=None):
+        data = asn1.open_source(data)
+        if end is None:
+            end = len(data)
+        tag, start, stop = _read_header(data, offset, end)
+        if self.tag is not None and tag != self.tag:
+            raise Error(f'{self!r}: unexpected tag')
+        return self.read(data, offset, start, stop)
+
+
+class Primitive(Schema):
+    typ = Types.Primitive
+
+    def __init__(self, nr, size=None, decode=None, encoding=DEFAULT_ENCODING):
+        self.nr = nr
+        self.tag = Tag(nr=nr, typ=Types.Primitive, cls=Classes.Universal)
+        if isinstance(size, int):
+            size = (size,)
+        self.size = None if size is None else frozenset(size)
+        if decode is None:
+            decode = asn1.Decoder.value_decoders.get((Classes.Universal, nr))
+            if decode is not None:
+                decode = functools.partial(decode, asn1.Decoder(encoding), nr)
+        self.decode_value = decode
+
+    def __repr__(self):
+        return f"Primitive({asn1.tag_to_string(self.nr)})"
+
+    def read(self, data, offset, start, stop):
+        if self.size is not None and stop - start not in self.size:
+            raise Error(f'{self!r}: unexpected length {stop - start}')
+        value = bytes(data[start:stop])
+        if self.decode_value is None:
+            return value
+        try:
+            return self.decode_value(value)
+        except ValueError as e:
+            raise Error(f'{self!r}: {e}') from e
+
+
+class Any(Schema):
+    typ = None
+
+    def __repr__(self):
+        return "Any()"
+
+    def implicit(self, nr, cls=Classes.Context):
+        raise TypeError('Any cannot be implicitly tagged')
+
+    def read(self, data, offset, start, stop):
+        return bytes(data[offset:stop])
+
+
+class Field:
+    def __init__(self, name, schema, optional=False, default=None):
+        self.name = name
+        self.schema = schema
+        self.optional = optional
+        self.default = default
+
+
+class Sequence(Schema):
+    typ = Types.Constructed
+
+    def __init__(self, record, fields, extensible=False):
+        self.tag = Tag(nr=Numbers.Sequence, typ=Types.Constructed, cls=Classes.Universal)
+        self.record = record
+        self.fields = tuple(fields)
+        self.extensible = extensible
+        names = tuple(field.name for field in self.fields)
+        if dataclasses.is_dataclass(record):
+            record_names = tuple(field.name for field in dataclasses.fields(record) if field.init)
+            if names != record_names:
+                raise ValueError(f'Schema fields {names} do not match {record.__name__} fields {record_names}')
+        self.read = self._compile()
+
+    def __repr__(self):
+        return f"Sequence({self.record.__name__})"
+
+    def _compile(self):
+        record = self.record
+        extensible = self.extensible
+        tags = tuple(field.schema.tag for field in self.fields)
+        readers = tuple(field.schema.read for field in self.fields)
+        required = tuple(not field.optional for field in self.fields)
+        defaults = tuple(field.default for field in self.fields)
+        names = tuple(field.name for field in self.fields)
+        count = len(self.fields)
+
+        def missing(index):
+            return Error(f'{record.__name__}: missing {names[index]}')
+
+        def read(data, offset, start, stop):
+            values = list(defaults)
+            index = 0
+            while start < stop:
+                tag, content, end = _read_header(data, start, stop)
+                position = index
+                while position < count and tags[position] is not None and tags[position] != tag:
+                    position += 1
+                if position < count:
+                    for skipped in range(index, position):
+                        if required[skipped]:
+                            raise missing(skipped)
+                    values[position] = readers[position](data, start, content, end)
+                    index = position + 1
+                elif not extensible:
+                    raise Error(f'{record.__name__}: unexpected tag after {names[index - 1] if index else "start"}')
+                start = end
+            for position in range(index, count):
+                if required[position]:
+                    raise missing(position)
+            return record(*values)
+
+        return read
+
+
+class SequenceOf(Schema):
+    typ = Types.Constructed
+
+    def __init__(self, schema):
+        self.tag = Tag(nr=Numbers.Sequence, typ=Types.Constructed, cls=Classes.Universal)
+        self.schema = schema
+        self.read = self._compile()
+
+    def __repr__(self):
+        return f"SequenceOf({self.schema!r})"
+
+    def _compile(self):
+        schema = self.schema
+        expected = schema.tag
+        read_item = schema.read
+
+        def read(data, offset, start, stop):
+            items = []
+            while start < stop:
+                tag, content, end = _read_header(data, start, stop)
+                if expected is not None and tag != expected:
+                    raise Error(f'{self!r}: unexpected tag')
+                items.append(read_item(data, start, content, end))
+                start = end
+            return items
+
+        return read
@@ -0,0 +1,169 @@
+import argparse
+import collections
+import functools
+import itertools
+import multiprocessing
+import sys
+
+import modules.Instrumentation as Instrumentation
+from modules.ContainerInfo import describe_header
+from modules.ParseCache import ParseCache, content_hash
+
+AuditResult = collections.namedtuple('AuditResult', 'name info error')
+
+
+def _read_headers(source, names, cache):
+    for name in names:
+        try:
+            with source.get_container(name, parts=("key_header",)) as container:
+                key_header = bytes(container.key_header)
+        except Exception as e:
+            yield AuditResult(name, None, str(e))
+            continue
+        if cache is None:
+            yield name, key_header, None
+            continue
+        digest = content_hash(key_header)
+        info = cache.get(digest)
+        if info is None:
+            yield name, key_header, digest
+        else:
+            cache.bind(name, digest)
+            yield AuditResult(name, info, None)
+
+
+def _audit_item(item):
+    name, key_header, digest = item
+    try:
+        return AuditResult(name, describe_header(key_header), None), digest
+    except Exception as e:
+        return AuditResult(name, None, str(e)), digest
+
+
+def audit(source, names=None, workers=None, chunk_size=16, ordered=True, cache=None):
+    if names is None:
+        names = source.containers()
+    for result, digest in _audit(_read_headers(source, names, cache), workers, chunk_size, ordered):
+        if digest is not None and result.error is None:
+            cache.put(digest, result.info, result.name)
+        yield result
+
+
+def _init_worker_metrics():
+    Instrumentation.enable()
+    Instrumentation.metrics.reset()
+
+
+def _audit_item_with_metrics(item):
+    return _audit_item(item), Instrumentation.metrics.drain()
+
+
+def _call_indexed(function, indexed_item):
+    index, item = indexed_item
+    return index, function(item)
+
+
+def _audit(items, workers, chunk_size, ordered):
+    if workers == 1:
+        for item in items:
+            yield (item, None) if isinstance(item, AuditResult) else _audit_item(item)
+        return
+    if not Instrumentation.enabled():
+        for output in _map_pool(_audit_item, items, workers, chunk_size, ordered):
+            yield (output, None) if isinstance(output, AuditResult) else output
+        return
+    for output in _map_pool(_audit_item_with_metrics, items, workers, chunk_size, ordered, _init_worker_metrics):
+        if isinstance(output, AuditResult):
+            yield output, None
+            continue
+        item, values = output
+        Instrumentation.metrics.merge(values)
+        yield item
+
+
+# Items that are already an AuditResult are passed through in their place and
+# never sent to the workers; the pool is only started for the first item that
+# needs one. Work items are numbered so that, in ordered mode, the results that
+# were ready earlier are yielded before the first worker result that follows
+# them.
+def _map_pool(function, items, workers, chunk_size, ordered, initializer=None):
+    items = iter(items)
+    for first in items:
+        if not isinstance(first, AuditResult):
+            break
+        yield first
+    else:
+        return
+    ready = collections.deque()
+
+    def work():
+        for index, item in enumerate(itertools.chain((first,), items)):
+            if isinstance(item, AuditResult):
+                ready.append((index, item))
+            else:
+                yield index, item
+
+    with multiprocessing.Pool(workers, initializer) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for index, output in imap(functools.partial(_call_indexed, function), work(), chunk_size):
+            while ready and (not ordered or ready[0][0] < index):
+                yield ready.popleft()[1]
+            yield output
+    while ready:
+        yield ready.popleft()[1]
+
+
+def _open_source(keypath):
+    if keypath is not None:
+        from classes.CryptoProDirectory import CryptoProDirectory
+        return CryptoProDirectory(keypath)
+    from classes.CurrentUser import CurrentUser
+    from classes.CryptoProRegistry import CryptoProRegistry
+    return CryptoProRegistry(CurrentUser().sid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit CryptoPro key containers in parallel.")
+    parser.add_argument("keypath", nargs="?", help="container directory (default: registry of the current user)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=16, help="containers per work item")
+    parser.add_argument("-u", "--unordered", action="store_true", help="report results as they complete")
+    parser.add_argument("--cache", help="SQLite file caching parsed headers by content hash")
+    parser.add_argument("--cache-size", type=int, default=10000, help="maximum number of cached headers")
+    parser.add_argument("--metrics", help="write Prometheus metrics of the audit to this file ('-' for stdout)")
+    args = parser.parse_args()
+    if args.metrics:
+        Instrumentation.enable()
+    source = _open_source(args.keypath)
+    cache = ParseCache(args.cache, args.cache_size) if args.cache else None
+    try:
+        _report(audit(source, workers=args.workers, chunk_size=args.chunk_size, ordered=not args.unordered,
+                      cache=cache))
+    finally:
+        if cache is not None:
+            cache.close()
+    if args.metrics:
+        _write_metrics(args.metrics)
+
+
+def _write_metrics(filename):
+    text = Instrumentation.metrics.to_prometheus()
+    if filename == "-":
+        sys.stdout.write(text)
+        return
+    with open(filename, "w") as file:
+        file.write(text)
+
+
+def _report(results):
+    for result in results:
+        if result.error is not None:
+            print(f"{result.name}: ERROR {result.error}")
+        else:
+            info = result.info
+            print(f"{result.name}: algorithm={info['algorithm']} expiry={info['expiry']} "
+                  f"key_usage={info['key_usage']} oids={len(info['oids'])}")
+
+
+if __name__ == '__main__':
+    main()
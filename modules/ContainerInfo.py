@@ -0,0 +1,70 @@
+import modules.asn1 as asn1
+from modules.asn1 import encapsulated_start
+
+ALGORITHM_OIDS = {
+    "1.2.643.2.2.19",
+    "1.2.643.2.2.98",
+    "1.2.643.7.1.1.1.1",
+    "1.2.643.7.1.1.1.2",
+    "1.2.643.7.1.1.6.1",
+    "1.2.643.7.1.1.6.2",
+}
+
+EXPIRATION_OID = "1.2.643.2.2.37.3.10"
+KEY_USAGE_OID = "2.5.29.15"
+
+key_usage_bits = (
+    "digitalSignature",
+    "nonRepudiation",
+    "keyEncipherment",
+    "dataEncipherment",
+    "keyAgreement",
+    "keyCertSign",
+    "cRLSign",
+    "encipherOnly",
+    "decipherOnly",
+)
+
+
+def _descend(data):
+    def descend(node):
+        start = node.offset + node.header_length
+        return encapsulated_start(data, node.tag, start, start + node.length)
+    return descend
+
+
+def _is_time(tag, value):
+    if tag.cls == asn1.Classes.Universal:
+        return tag.nr in (asn1.Numbers.UTCTime, asn1.Numbers.GeneralizedTime)
+    return tag.cls == asn1.Classes.Context and len(value) in (13, 15) and value.endswith(b'Z') and value[:-1].isdigit()
+
+
+def _key_usage(value):
+    if not value:
+        return []
+    bits = int.from_bytes(value[1:], 'big') >> value[0]
+    width = (len(value) - 1) * 8 - value[0]
+    return [name for i, name in enumerate(key_usage_bits) if i < width and bits >> (width - 1 - i) & 1]
+
+
+def describe_header(key_header):
+    data = asn1.open_source(key_header)
+    info = {"oids": [], "algorithm": None, "expiry": None, "key_usage": None}
+    last_oid = None
+    for event, node in asn1.Walker(data, descend=_descend(data)):
+        if event != asn1.PRIMITIVE:
+            continue
+        start = node.offset + node.header_length
+        value = bytes(data[start:start + node.length])
+        tag = node.tag
+        if tag.cls == asn1.Classes.Universal and tag.nr == asn1.Numbers.ObjectIdentifier:
+            last_oid = asn1.decode_object_identifier(value)
+            info["oids"].append(last_oid)
+            if info["algorithm"] is None and last_oid in ALGORITHM_OIDS:
+                info["algorithm"] = last_oid
+        elif last_oid == EXPIRATION_OID and info["expiry"] is None and _is_time(tag, value):
+            info["expiry"] = value.decode("ascii")
+        elif last_oid == KEY_USAGE_OID and info["key_usage"] is None \
+                and tag.cls == asn1.Classes.Universal and tag.nr == asn1.Numbers.BitString:
+            info["key_usage"] = _key_usage(value)
+    return info
@@ -0,0 +1,86 @@
+import modules.asn1 as asn1
+
+gost_oid_names = {
+    # CryptoPro (1.2.643.2.2)
+    "1.2.643.2.2.3": "id-GostR3411-94-with-GostR3410-2001",
+    "1.2.643.2.2.4": "id-GostR3411-94-with-GostR3410-94",
+    "1.2.643.2.2.9": "id-GostR3411-94",
+    "1.2.643.2.2.10": "id-HMACGostR3411-94",
+    "1.2.643.2.2.13.0": "id-Gost28147-89-None-KeyWrap",
+    "1.2.643.2.2.13.1": "id-Gost28147-89-CryptoPro-KeyWrap",
+    "1.2.643.2.2.14.0": "id-Gost28147-89-None-KeyMeshing",
+    "1.2.643.2.2.14.1": "id-Gost28147-89-CryptoPro-KeyMeshing",
+    "1.2.643.2.2.19": "id-GostR3410-2001",
+    "1.2.643.2.2.20": "id-GostR3410-94",
+    "1.2.643.2.2.21": "id-Gost28147-89",
+    "1.2.643.2.2.22": "id-Gost28147-89-MAC",
+    "1.2.643.2.2.23": "id-GostR3411-94-prf",
+    "1.2.643.2.2.30.0": "id-GostR3411-94-TestParamSet",
+    "1.2.643.2.2.30.1": "id-GostR3411-94-CryptoProParamSet",
+    "1.2.643.2.2.31.0": "id-Gost28147-89-TestParamSet",
+    "1.2.643.2.2.31.1": "id-Gost28147-89-CryptoPro-A-ParamSet",
+    "1.2.643.2.2.31.2": "id-Gost28147-89-CryptoPro-B-ParamSet",
+    "1.2.643.2.2.31.3": "id-Gost28147-89-CryptoPro-C-ParamSet",
+    "1.2.643.2.2.31.4": "id-Gost28147-89-CryptoPro-D-ParamSet",
+    "1.2.643.2.2.31.5": "id-Gost28147-89-CryptoPro-Oscar-1-1-ParamSet",
+    "1.2.643.2.2.31.6": "id-Gost28147-89-CryptoPro-Oscar-1-0-ParamSet",
+    "1.2.643.2.2.31.7": "id-Gost28147-89-CryptoPro-RIC-1-ParamSet",
+    "1.2.643.2.2.32.0": "id-GostR3410-94-TestParamSet",
+    "1.2.643.2.2.32.2": "id-GostR3410-94-CryptoPro-A-ParamSet",
+    "1.2.643.2.2.32.3": "id-GostR3410-94-CryptoPro-B-ParamSet",
+    "1.2.643.2.2.32.4": "id-GostR3410-94-CryptoPro-C-ParamSet",
+    "1.2.643.2.2.32.5": "id-GostR3410-94-CryptoPro-D-ParamSet",
+    "1.2.643.2.2.33.1": "id-GostR3410-94-CryptoPro-XchA-ParamSet",
+    "1.2.643.2.2.33.2": "id-GostR3410-94-CryptoPro-XchB-ParamSet",
+    "1.2.643.2.2.33.3": "id-GostR3410-94-CryptoPro-XchC-ParamSet",
+    "1.2.643.2.2.35.0": "id-GostR3410-2001-TestParamSet",
+    "1.2.643.2.2.35.1": "id-GostR3410-2001-CryptoPro-A-ParamSet",
+    "1.2.643.2.2.35.2": "id-GostR3410-2001-CryptoPro-B-ParamSet",
+    "1.2.643.2.2.35.3": "id-GostR3410-2001-CryptoPro-C-ParamSet",
+    "1.2.643.2.2.36.0": "id-GostR3410-2001-CryptoPro-XchA-ParamSet",
+    "1.2.643.2.2.36.1": "id-GostR3410-2001-CryptoPro-XchB-ParamSet",
+    "1.2.643.2.2.98": "id-GostR3410-2001DH",
+    "1.2.643.2.2.99": "id-GostR3410-94DH",
+    # TC 26 (1.2.643.7.1)
+    "1.2.643.7.1.1.1.1": "id-tc26-gost3410-12-256",
+    "1.2.643.7.1.1.1.2": "id-tc26-gost3410-12-512",
+    "1.2.643.7.1.1.2.2": "id-tc26-gost3411-12-256",
+    "1.2.643.7.1.1.2.3": "id-tc26-gost3411-12-512",
+    "1.2.643.7.1.1.3.2": "id-tc26-signwithdigest-gost3410-12-256",
+    "1.2.643.7.1.1.3.3": "id-tc26-signwithdigest-gost3410-12-512",
+    "1.2.643.7.1.1.4.1": "id-tc26-hmac-gost-3411-12-256",
+    "1.2.643.7.1.1.4.2": "id-tc26-hmac-gost-3411-12-512",
+    "1.2.643.7.1.1.5.1": "id-tc26-cipher-gostr3412-2015-magma",
+    "1.2.643.7.1.1.5.2": "id-tc26-cipher-gostr3412-2015-kuznyechik",
+    "1.2.643.7.1.1.6.1": "id-tc26-agreement-gost-3410-12-256",
+    "1.2.643.7.1.1.6.2": "id-tc26-agreement-gost-3410-12-512",
+    "1.2.643.7.1.2.1.1.1": "id-tc26-gost-3410-12-256-paramSetA",
+    "1.2.643.7.1.2.1.1.2": "id-tc26-gost-3410-12-256-paramSetB",
+    "1.2.643.7.1.2.1.1.3": "id-tc26-gost-3410-12-256-paramSetC",
+    "1.2.643.7.1.2.1.1.4": "id-tc26-gost-3410-12-256-paramSetD",
+    "1.2.643.7.1.2.1.2.0": "id-tc26-gost-3410-12-512-paramSetTest",
+    "1.2.643.7.1.2.1.2.1": "id-tc26-gost-3410-12-512-paramSetA",
+    "1.2.643.7.1.2.1.2.2": "id-tc26-gost-3410-12-512-paramSetB",
+    "1.2.643.7.1.2.1.2.3": "id-tc26-gost-3410-12-512-paramSetC",
+    "1.2.643.7.1.2.5.1.1": "id-tc26-gost-28147-param-Z",
+    # Russian certificate attributes and extensions
+    "1.2.643.3.131.1.1": "INN",
+    "1.2.643.100.1": "OGRN",
+    "1.2.643.100.3": "SNILS",
+    "1.2.643.100.4": "INNLE",
+    "1.2.643.100.5": "OGRNIP",
+    "1.2.643.100.111": "subjectSignTool",
+    "1.2.643.100.112": "issuerSignTool",
+    "1.2.643.100.113.1": "KC1",
+    "1.2.643.100.113.2": "KC2",
+    "1.2.643.100.113.3": "KC3",
+    "1.2.643.100.113.4": "KB1",
+    "1.2.643.100.113.5": "KB2",
+    "1.2.643.100.113.6": "KA1",
+}
+
+asn1.oids.update(gost_oid_names)
+
+
+def register(dotted, name):
+    return asn1.oids.register(dotted, name)
@@ -0,0 +1,230 @@
+import functools
+import threading
+from time import perf_counter
+
+import modules.asn1 as asn1
+from classes.Asn1Object import Asn1Object
+from classes.RegistryBackend import DictBackend, WinRegBackend
+from modules.asn1 import Classes, cls_to_string, tag_to_string
+
+REGISTRY_METHODS = ("has_key", "enum_keys", "enum_values", "query_value")
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def add(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def observe(self, name, size, seconds, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            values = self.values
+            for metric, value in ((f"{name}_total", 1), (f"{name}_bytes_total", size),
+                                  (f"{name}_seconds_total", seconds)):
+                values[metric, key] = values.get((metric, key), 0) + value
+
+    def reset(self):
+        with self.lock:
+            self.values = {}
+
+    def drain(self):
+        with self.lock:
+            values, self.values = self.values, {}
+        return values
+
+    def merge(self, values):
+        with self.lock:
+            for key, value in values.items():
+                self.values[key] = self.values.get(key, 0) + value
+
+    def as_dict(self):
+        with self.lock:
+            values = dict(self.values)
+        metrics = {}
+        for (name, labels), value in sorted(values.items()):
+            metrics.setdefault(name, []).append(dict(labels, value=value))
+        return metrics
+
+    def to_prometheus(self):
+        with self.lock:
+            values = dict(self.values)
+        lines = []
+        last_name = None
+        for (name, labels), value in sorted(values.items()):
+            if name != last_name:
+                lines.append(f"# TYPE {name} counter")
+                last_name = name
+            if labels:
+                label_text = ",".join(f'{label}="{_escape(label_value)}"' for label, label_value in labels)
+                lines.append(f"{name}{{{label_text}}} {value}")
+            else:
+                lines.append(f"{name} {value}")
+        return "".join(line + "\n" for line in lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _tag_labels(cls, nr):
+    try:
+        cls_name = cls_to_string(cls)
+    except ValueError:
+        cls_name = f"{cls:#02x}"
+    if cls == Classes.Universal:
+        return {"class": cls_name, "tag": tag_to_string(nr)}
+    return {"class": cls_name, "tag": str(nr)}
+
+
+metrics = Metrics()
+
+_patches = []
+_registry_state = threading.local()
+
+
+def _patch(owner, attribute, wrap):
+    original = owner.__dict__[attribute]
+    function = original.__func__ if isinstance(original, staticmethod) else original
+    wrapper = functools.wraps(function)(wrap(function))
+    if isinstance(original, staticmethod):
+        wrapper = staticmethod(wrapper)
+    _patches.append((owner, attribute, original))
+    setattr(owner, attribute, wrapper)
+
+
+def _timed_decode(engine, function, tag_of, size_of):
+    def wrapper(self, *args):
+        start = perf_counter()
+        try:
+            return function(self, *args)
+        except Exception:
+            cls, nr = tag_of(self, args)
+            metrics.add("asn1_decode_errors_total", engine=engine, **_tag_labels(cls, nr))
+            raise
+        finally:
+            seconds = perf_counter() - start
+            cls, nr = tag_of(self, args)
+            metrics.observe("asn1_decode", size_of(self, args), seconds, engine=engine, **_tag_labels(cls, nr))
+    return wrapper
+
+
+def _decoder_value(function):
+    return _timed_decode("decoder", function, lambda self, args: (args[0], args[1]),
+                         lambda self, args: len(args[2]))
+
+
+def _asn1object_value(function):
+    return _timed_decode("asn1object", function, lambda self, args: (self.tag.cls, self.tag.nr),
+                         lambda self, args: self.length)
+
+
+def _walker_next(function):
+    def wrapper(self):
+        event, node = function(self)
+        if event != asn1.END_CONSTRUCTED:
+            size = node.header_length
+            if event == asn1.PRIMITIVE:
+                size += node.length
+            metrics.add("asn1_walk_nodes_total", **_tag_labels(node.tag.cls, node.tag.nr))
+            metrics.add("asn1_walk_bytes_total", size)
+        return event, node
+    return wrapper
+
+
+def _encapsulated_start(function):
+    def wrapper(self, tag, start, end):
+        offset = function(self, tag, start, end)
+        if tag.cls == Classes.Universal and tag.nr in self.encapsulated_tag_prefixes:
+            result = "rejected" if offset is None else "accepted"
+            metrics.add("asn1object_speculative_parses_total", result=result, **_tag_labels(tag.cls, tag.nr))
+        return offset
+    return wrapper
+
+
+def _fall_back(function):
+    def wrapper(stack):
+        depth = function(stack)
+        metrics.add("asn1object_speculative_failures_total", result="failed" if depth is None else "recovered")
+        return depth
+    return wrapper
+
+
+def _registry_call(method, function):
+    def record(self, start, failed):
+        labels = {"backend": type(self).__name__, "method": method}
+        metrics.add("registry_calls_total", **labels)
+        metrics.add("registry_call_seconds_total", perf_counter() - start, **labels)
+        if failed:
+            metrics.add("registry_call_errors_total", **labels)
+
+    def wrapper(self, *args, **kwargs):
+        if getattr(_registry_state, "active", False):
+            return function(self, *args, **kwargs)
+        _registry_state.active = True
+        start = perf_counter()
+        failed = True
+        try:
+            result = function(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _registry_state.active = False
+            record(self, start, failed)
+
+    # Every step of an enumeration is one call into the backend (EnumKey for
+    # winreg), so each next() is timed and recorded on its own and the time
+    # the caller spends between items is not counted.
+    def generator_wrapper(self, *args, **kwargs):
+        if getattr(_registry_state, "active", False):
+            yield from function(self, *args, **kwargs)
+            return
+        iterator = function(self, *args, **kwargs)
+        try:
+            while True:
+                _registry_state.active = True
+                start = perf_counter()
+                failed = True
+                try:
+                    item = next(iterator)
+                    failed = False
+                except StopIteration:
+                    failed = False
+                    return
+                finally:
+                    _registry_state.active = False
+                    record(self, start, failed)
+                yield item
+        finally:
+            iterator.close()
+
+    if method == "enum_keys":
+        return generator_wrapper
+    return wrapper
+
+
+def enabled():
+    return bool(_patches)
+
+
+def enable():
+    if _patches:
+        return
+    _patch(asn1.Decoder, "_decode_value", _decoder_value)
+    _patch(asn1.Walker, "__next__", _walker_next)
+    _patch(Asn1Object, "_primitive_value", _asn1object_value)
+    _patch(Asn1Object, "_encapsulated_start", _encapsulated_start)
+    _patch(Asn1Object, "_fall_back", _fall_back)
+    for backend in (WinRegBackend, DictBackend):
+        for method in REGISTRY_METHODS:
+            _patch(backend, method, functools.partial(_registry_call, method))
+
+
+def disable():
+    while _patches:
+        owner, attribute, original = _patches.pop()
+        setattr(owner, attribute, original)
@@ -0,0 +1,131 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from modules.asn1 import Numbers
+from modules.AsnSchema import Any, Field, Primitive, Sequence, SequenceOf
+
+KEY_SIZES = (32, 64)
+MAC_SIZES = range(1, 5)
+
+
+@dataclass
+class GostKeyParameters:
+    public_key_param_set: str
+    digest_param_set: Optional[str] = None
+    encryption_param_set: Optional[str] = None
+
+
+@dataclass
+class AlgorithmIdentifier:
+    algorithm: str
+    parameters: Optional[bytes] = None
+
+
+@dataclass
+class PrivateKeyAlgorithm:
+    algorithm: str
+    parameters: Optional[GostKeyParameters] = None
+
+
+@dataclass
+class PrivateKeyParameters:
+    attributes: bytes
+    algorithm: Optional[PrivateKeyAlgorithm] = None
+
+
+@dataclass
+class KeyContainerContent:
+    container_algorithm: Optional[AlgorithmIdentifier]
+    container_name: Optional[str]
+    attributes: bytes
+    primary_private_key_parameters: PrivateKeyParameters
+    hmac_password: Optional[bytes] = None
+    secondary_private_key_parameters: Optional[PrivateKeyParameters] = None
+    primary_certificate: Optional[bytes] = None
+    secondary_certificate: Optional[bytes] = None
+    encryption_container_name: Optional[str] = None
+    primary_fp: Optional[bytes] = None
+    secondary_fp: Optional[bytes] = None
+    extensions: Optional[List[bytes]] = None
+
+
+@dataclass
+class KeyHeader:
+    content: KeyContainerContent
+    hmac: bytes
+
+
+@dataclass
+class KeyMasks:
+    mask: bytes
+    salt: bytes
+    hmac: bytes
+
+
+@dataclass
+class PrimaryKey:
+    key: bytes
+
+
+GOST_KEY_PARAMETERS = Sequence(GostKeyParameters, (
+    Field("public_key_param_set", Primitive(Numbers.ObjectIdentifier)),
+    Field("digest_param_set", Primitive(Numbers.ObjectIdentifier), optional=True),
+    Field("encryption_param_set", Primitive(Numbers.ObjectIdentifier), optional=True),
+))
+
+ALGORITHM_IDENTIFIER = Sequence(AlgorithmIdentifier, (
+    Field("algorithm", Primitive(Numbers.ObjectIdentifier)),
+    Field("parameters", Any(), optional=True),
+))
+
+PRIVATE_KEY_ALGORITHM = Sequence(PrivateKeyAlgorithm, (
+    Field("algorithm", Primitive(Numbers.ObjectIdentifier)),
+    Field("parameters", GOST_KEY_PARAMETERS, optional=True),
+))
+
+PRIVATE_KEY_PARAMETERS = Sequence(PrivateKeyParameters, (
+    Field("attributes", Primitive(Numbers.BitString)),
+    Field("algorithm", PRIVATE_KEY_ALGORITHM.implicit(0), optional=True),
+))
+
+KEY_CONTAINER_CONTENT = Sequence(KeyContainerContent, (
+    Field("container_algorithm", ALGORITHM_IDENTIFIER.implicit(0), optional=True),
+    Field("container_name", Primitive(Numbers.IA5String).implicit(1), optional=True),
+    Field("attributes", Primitive(Numbers.BitString)),
+    Field("primary_private_key_parameters", PRIVATE_KEY_PARAMETERS),
+    Field("hmac_password", Primitive(Numbers.OctetString).implicit(2), optional=True),
+    Field("secondary_private_key_parameters", PRIVATE_KEY_PARAMETERS.implicit(4), optional=True),
+    Field("primary_certificate", Primitive(Numbers.OctetString).implicit(5), optional=True),
+    Field("secondary_certificate", Primitive(Numbers.OctetString).implicit(6), optional=True),
+    Field("encryption_container_name", Primitive(Numbers.UTF8String).implicit(7), optional=True),
+    Field("primary_fp", Primitive(Numbers.OctetString, size=MAC_SIZES).implicit(10), optional=True),
+    Field("secondary_fp", Primitive(Numbers.OctetString, size=MAC_SIZES).implicit(11), optional=True),
+    Field("extensions", SequenceOf(Any()).implicit(14), optional=True),
+), extensible=True)
+
+KEY_HEADER = Sequence(KeyHeader, (
+    Field("content", KEY_CONTAINER_CONTENT),
+    Field("hmac", Primitive(Numbers.OctetString, size=MAC_SIZES)),
+))
+
+KEY_MASKS = Sequence(KeyMasks, (
+    Field("mask", Primitive(Numbers.OctetString, size=KEY_SIZES)),
+    Field("salt", Primitive(Numbers.OctetString, size=12)),
+    Field("hmac", Primitive(Numbers.OctetString, size=4)),
+))
+
+PRIMARY_KEY = Sequence(PrimaryKey, (
+    Field("key", Primitive(Numbers.OctetString, size=KEY_SIZES)),
+))
+
+PART_SCHEMAS = {
+    "key_header": KEY_HEADER,
+    "key_masks": KEY_MASKS,
+    "key_masks2": KEY_MASKS,
+    "key_primary": PRIMARY_KEY,
+    "key_primary2": PRIMARY_KEY,
+}
+
+
+def decode_part(container, part):
+    return PART_SCHEMAS[part].decode(getattr(container, part))
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import sqlite3
+import threading
+
+from modules.ContainerInfo import describe_header
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParseCache:
+    def __init__(self, filename, max_entries=10000):
+        self.max_entries = max_entries
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS entries (hash TEXT PRIMARY KEY, info TEXT NOT NULL, used INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+            CREATE TABLE IF NOT EXISTS names (name TEXT PRIMARY KEY, hash TEXT NOT NULL);
+        ''')
+        self.clock, = self.connection.execute('SELECT COALESCE(MAX(used), 0) FROM entries').fetchone()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.commit()
+                self.connection.close()
+                self.connection = None
+
+    def get(self, digest):
+        with self.lock:
+            row = self.connection.execute('SELECT info FROM entries WHERE hash = ?', (digest,)).fetchone()
+            if row is None:
+                return None
+            self.clock += 1
+            with self.connection:
+                self.connection.execute('UPDATE entries SET used = ? WHERE hash = ?', (self.clock, digest))
+        return json.loads(row[0])
+
+    # Every change is committed on its own, so a killed run keeps what it has
+    # stored and other processes sharing the file are not locked out.
+    def put(self, digest, info, name=None):
+        with self.lock, self.connection:
+            self.clock += 1
+            self.connection.execute('INSERT OR REPLACE INTO entries (hash, info, used) VALUES (?, ?, ?)',
+                                    (digest, json.dumps(info), self.clock))
+            if name is not None:
+                self._bind(name, digest)
+            self._evict()
+
+    def bind(self, name, digest):
+        with self.lock, self.connection:
+            self._bind(name, digest)
+
+    def invalidate(self, digest):
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM names WHERE hash = ?', (digest,))
+            self.connection.execute('DELETE FROM entries WHERE hash = ?', (digest,))
+
+    def _bind(self, name, digest):
+        row = self.connection.execute('SELECT hash FROM names WHERE name = ?', (name,)).fetchone()
+        self.connection.execute('INSERT OR REPLACE INTO names (name, hash) VALUES (?, ?)', (name, digest))
+        if row is not None and row[0] != digest:
+            self.connection.execute('DELETE FROM entries WHERE hash = ? AND hash NOT IN (SELECT hash FROM names)',
+                                    (row[0],))
+
+    def _evict(self):
+        count, = self.connection.execute('SELECT COUNT(*) FROM entries').fetchone()
+        if count <= self.max_entries:
+            return
+        self.connection.execute('DELETE FROM entries WHERE hash IN '
+                                '(SELECT hash FROM entries ORDER BY used LIMIT ?)', (count - self.max_entries,))
+        self.connection.execute('DELETE FROM names WHERE hash NOT IN (SELECT hash FROM entries)')
+
+    def describe(self, name, key_header, parser=describe_header):
+        digest = content_hash(key_header)
+        info = self.get(digest)
+        if info is None:
+            info = parser(key_header)
+            self.put(digest, info, name)
+        else:
+            self.bind(name, digest)
+        return info
@@ -17,7 +17,12 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import collections
+import contextlib
+import io
+import mmap
 import re
+import sys
+import threading
 from builtins import bytes
 from builtins import int
 from builtins import range
@@ -62,6 +67,92 @@ Tag = collections.namedtuple('Tag', 'nr typ cls')
 """A named tuple to represent ASN.1 tags as returned by `Decoder.peek()` and
 `Decoder.read()`."""
 
+tag_to_string_map = {
+    Numbers.Boolean: "BOOLEAN",
+    Numbers.Integer: "INTEGER",
+    Numbers.BitString: "BIT STRING",
+    Numbers.OctetString: "OCTET STRING",
+    Numbers.Null: "NULL",
+    Numbers.ObjectIdentifier: "OBJECT",
+    Numbers.PrintableString: "PRINTABLESTRING",
+    Numbers.IA5String: "IA5STRING",
+    Numbers.UTCTime: "UTCTIME",
+    Numbers.GeneralizedTime: "GENERALIZED TIME",
+    Numbers.Enumerated: "ENUMERATED",
+    Numbers.Sequence: "SEQUENCE",
+    Numbers.Set: "SET"
+}
+
+cls_to_string_map = {
+    Classes.Universal: "U",
+    Classes.Application: "A",
+    Classes.Context: "C",
+    Classes.Private: "P"
+}
+
+
+def tag_to_string(nr):  # type: (int) -> str
+    """Return a string representation of an ASN.1 tag number."""
+    if nr in tag_to_string_map:
+        return tag_to_string_map[nr]
+    return '{:#02x}'.format(nr)
+
+
+def cls_to_string(cls):  # type: (int) -> str
+    """Return a string representation of an ASN.1 class."""
+    if cls in cls_to_string_map:
+        return cls_to_string_map[cls]
+    raise ValueError('Illegal class: {:#02x}'.format(cls))
+
+
+
+class Node(collections.namedtuple('Node', 'tag offset header_length length depth indefinite',
+                                  defaults=(False,))):
+    """A named tuple to represent one ASN.1 element as produced by `Walker`.
+    ``offset`` is the absolute offset of the tag, the content starts
+    ``header_length`` bytes later and is ``length`` bytes long. ``depth`` is
+    the nesting level, 0 for the elements the walk starts at.
+
+    ``indefinite`` is True for a constructed element encoded with the BER
+    indefinite length form. Its ``length`` is ``None`` until the
+    end-of-contents octets have been found, and then includes them."""
+
+    __slots__ = ()
+
+    @property
+    def content_end(self):  # type: () -> int
+        """The offset where the content ends, before any end-of-contents
+        octets."""
+        end = self.offset + self.header_length + self.length
+        if self.indefinite:
+            end -= 2
+        return end
+
+    @property
+    def end(self):  # type: () -> int
+        """The offset just past the element."""
+        return self.offset + self.header_length + self.length
+
+
+START_CONSTRUCTED = 'start_constructed'
+PRIMITIVE = 'primitive'
+END_CONSTRUCTED = 'end_constructed'
+
+DEFAULT_MAX_DEPTH = 64
+DEFAULT_MAX_NODES = 100000
+
+DEFAULT_ENCODING = 'cp1251'
+"""Encoding of the 8-bit character string types. CryptoPro writes
+Windows-1251 text into them; UTF8String is always decoded as UTF-8."""
+
+END_OF_CONTENTS = b'\x00\x00'
+
+string_numbers = frozenset((Numbers.BitString, Numbers.OctetString, Numbers.UTF8String,
+                            Numbers.PrintableString, Numbers.IA5String, Numbers.UTCTime,
+                            Numbers.GeneralizedTime, Numbers.UnicodeString))
+"""Universal tag numbers that BER allows to be split into segments using the
+constructed encoding."""
+
 
 class Error(Exception):
     """ASN.11 encoding or decoding error."""
@@ -263,33 +354,19 @@ class Encoder(object):
         self.m_stack[-1].append(s)
 
     def _encode_value(self, cls, nr, value):  # type: (int, int, any) -> bytes
-        """Encode a value."""
-        if cls != Classes.Universal:
+        """Encode a value with the function registered for ``(cls, nr)`` in
+        `Encoder.value_encoders`. Values of other tags must already be
+        encoded as bytes."""
+        encode = self.value_encoders.get((cls, nr))
+        if encode is None:
             return value
-        if nr in (Numbers.Integer, Numbers.Enumerated):
-            return self._encode_integer(value)
-        if nr in (Numbers.OctetString, Numbers.PrintableString,
-                  Numbers.UTF8String, Numbers.IA5String,
-                  Numbers.UnicodeString, Numbers.UTCTime,
-                  Numbers.GeneralizedTime):
-            return self._encode_octet_string(value)
-        if nr == Numbers.BitString:
-            return self._encode_bit_string(value)
-        if nr == Numbers.Boolean:
-            return self._encode_boolean(value)
-        if nr == Numbers.Null:
-            return self._encode_null()
-        if nr == Numbers.ObjectIdentifier:
-            return self._encode_object_identifier(value)
-        return value
+        return encode(self, nr, value)
 
-    @staticmethod
-    def _encode_boolean(value):  # type: (bool) -> bytes
+    def _encode_boolean(self, nr, value):  # type: (int, bool) -> bytes
         """Encode a boolean."""
         return value and bytes(b'\xff') or bytes(b'\x00')
 
-    @staticmethod
-    def _encode_integer(value):  # type: (int) -> bytes
+    def _encode_integer(self, nr, value):  # type: (int, int) -> bytes
         """Encode an integer."""
         if value < 0:
             value = -value
@@ -318,8 +395,7 @@ class Encoder(object):
         values.reverse()
         return bytes(values)
 
-    @staticmethod
-    def _encode_octet_string(value):  # type: (object) -> bytes
+    def _encode_octet_string(self, nr, value):  # type: (int, object) -> bytes
         """Encode an octetstring."""
         # Use the primitive encoding
         assert isinstance(value, str) or isinstance(value, bytes)
@@ -328,21 +404,19 @@ class Encoder(object):
         else:
             return value
 
-    @staticmethod
-    def _encode_bit_string(value):  # type: (object) -> bytes
+    def _encode_bit_string(self, nr, value):  # type: (int, object) -> bytes
         """Encode a bitstring. Assumes no unused bytes."""
         # Use the primitive encoding
         assert isinstance(value, bytes)
         return b'\x00' + value
 
-    @staticmethod
-    def _encode_null():  # type: () -> bytes
+    def _encode_null(self, nr, value):  # type: (int, None) -> bytes
         """Encode a Null value."""
         return bytes(b'')
 
     _re_oid = re.compile(r'^[0-9]+(\.[0-9]+)+$')
 
-    def _encode_object_identifier(self, oid):  # type: (str) -> bytes
+    def _encode_object_identifier(self, nr, oid):  # type: (int, str) -> bytes
         """Encode an object identifier."""
         if not self._re_oid.match(oid):
             raise Error('Illegal object identifier')
@@ -360,28 +434,224 @@ class Encoder(object):
         result.reverse()
         return bytes(result)
 
-
-class Decoder(object):
-    """ASN.1 decoder. Understands BER (and DER which is a subset)."""
+    value_encoders = {
+        (Classes.Universal, Numbers.Boolean): _encode_boolean,
+        (Classes.Universal, Numbers.Integer): _encode_integer,
+        (Classes.Universal, Numbers.Enumerated): _encode_integer,
+        (Classes.Universal, Numbers.BitString): _encode_bit_string,
+        (Classes.Universal, Numbers.OctetString): _encode_octet_string,
+        (Classes.Universal, Numbers.Null): _encode_null,
+        (Classes.Universal, Numbers.ObjectIdentifier): _encode_object_identifier,
+        (Classes.Universal, Numbers.UTF8String): _encode_octet_string,
+        (Classes.Universal, Numbers.PrintableString): _encode_octet_string,
+        (Classes.Universal, Numbers.IA5String): _encode_octet_string,
+        (Classes.Universal, Numbers.UTCTime): _encode_octet_string,
+        (Classes.Universal, Numbers.GeneralizedTime): _encode_octet_string,
+        (Classes.Universal, Numbers.UnicodeString): _encode_octet_string,
+    }
+    """Functions that encode primitive values, indexed by ``(cls, nr)``.
+    See `register_encoder()`."""
+
+
+def register_encoder(cls, nr, function, table=None):  # type: (int, int, any, dict) -> None
+    """Register the function that encodes the values of primitive tags of
+    class ``cls`` and number ``nr``.
+
+    The function is called as ``function(encoder, nr, value)`` and returns
+    the content octets as bytes. Use this to encode context specific,
+    private or application specific tags from Python values, or to change
+    how a universal type is encoded.
+
+    Args:
+        cls (int): The tag class. Use ``Classes`` enumeration.
+
+        nr (int): The tag number. Use ``Numbers`` enumeration for universal
+            tags.
+
+        function (callable): The encoder, or None to remove the registered
+            one so that values of the tag must be passed as bytes.
+
+        table (dict): The table to register in. Defaults to
+            `Encoder.value_encoders`, which every encoder shares.
+
+    Returns:
+        None
+    """
+    if table is None:
+        table = Encoder.value_encoders
+    if function is None:
+        table.pop((cls, nr), None)
+    else:
+        table[cls, nr] = function
+
+
+class BufferedEncoder(Encoder):
+    """ASN.1 encoder that writes all output into a single growable
+    ``bytearray``. Uses DER encoding.
+
+    The lengths of constructed types are not known until
+    `BufferedEncoder.leave()`, so they are kept apart from the buffer as
+    (offset, length octets) pairs, in the order their types were entered.
+    `BufferedEncoder.output()` then inserts all of them in one backward
+    pass, so each byte is moved at most once.
+    """
 
     def __init__(self):  # type: () -> None
         """Constructor."""
+        super(BufferedEncoder, self).__init__()
+        self.m_buffer = None
+        self.m_lengths = None
+
+    def start(self):  # type: () -> None
+        """This method instructs the encoder to start encoding a new ASN.1
+        output. This method may be called at any time to reset the encoder,
+        and resets the current output (if any).
+        """
+        self.m_buffer = bytearray()
+        self.m_lengths = []
+        # Each frame is [start offset, length octets of nested types, index
+        # into m_lengths].
+        self.m_stack = [[0, 0, None]]
+
+    def enter(self, nr, cls=None):  # type: (int, int) -> None
+        """This method starts the construction of a constructed type.
+        See `Encoder.enter()`.
+        """
+        if self.m_stack is None:
+            raise Error('Encoder not initialized. Call start() first.')
+        if cls is None:
+            cls = Classes.Universal
+        self._emit_tag(nr, Types.Constructed, cls)
+        offset = len(self.m_buffer)
+        self.m_stack.append([offset, 0, len(self.m_lengths)])
+        self.m_lengths.append((offset, None))
+
+    def leave(self):  # type: () -> None
+        """This method completes the construction of a constructed type by
+        recording its length.
+        """
+        if self.m_stack is None:
+            raise Error('Encoder not initialized. Call start() first.')
+        if len(self.m_stack) == 1:
+            raise Error('Tag stack is empty.')
+        start, nested, index = self.m_stack.pop()
+        length = len(self.m_buffer) - start + nested
+        if length < 128:
+            octets = bytes((length,))
+        else:
+            count = (length.bit_length() + 7) // 8
+            octets = bytes((0x80 | count,)) + length.to_bytes(count, 'big')
+        self.m_lengths[index] = (start, octets)
+        self.m_stack[-1][1] += nested + len(octets)
+
+    def output(self):  # type: () -> bytes
+        """This method returns the encoded ASN.1 data as plain Python
+        ``bytes``. See `Encoder.output()`.
+        """
+        if self.m_stack is None:
+            raise Error('Encoder not initialized. Call start() first.')
+        if len(self.m_stack) != 1:
+            raise Error('Stack is not empty.')
+        if self.m_lengths:
+            self._insert_lengths()
+        return bytes(self.m_buffer)
+
+    def _insert_lengths(self):  # type: () -> None
+        """Grow the buffer once and move every segment of it, from the last
+        one backwards, to its final place after the length octets recorded
+        by `BufferedEncoder.leave()`."""
+        end = len(self.m_buffer)
+        shift = self.m_stack[0][1]
+        self.m_buffer.extend(bytes(shift))
+        buffer = memoryview(self.m_buffer)
+        try:
+            for offset, octets in reversed(self.m_lengths):
+                buffer[offset + shift:end + shift] = buffer[offset:end]
+                shift -= len(octets)
+                buffer[offset + shift:offset + shift + len(octets)] = octets
+                end = offset
+        finally:
+            buffer.release()
+        self.m_lengths = []
+        self.m_stack[0][1] = 0
+
+    def _emit_tag_short(self, nr, typ, cls):  # type: (int, int, int) -> None
+        """Emit a short (< 31 bytes) tag."""
+        assert nr < 31
+        self.m_buffer.append(nr | typ | cls)
+
+    def _emit_length_short(self, length):  # type: (int) -> None
+        """Emit the short length form (< 128 octets)."""
+        assert length < 128
+        self.m_buffer.append(length)
+
+    def _emit_length_long(self, length):  # type: (int) -> None
+        """Emit the long length form (>= 128 octets)."""
+        count = (length.bit_length() + 7) // 8
+        # really for correctness as this should not happen anytime soon
+        assert count < 127
+        self.m_buffer.append(0x80 | count)
+        self.m_buffer += length.to_bytes(count, 'big')
+
+    def _emit(self, s):  # type: (bytes) -> None
+        """Emit raw bytes."""
+        assert isinstance(s, bytes)
+        self.m_buffer += s
+
+
+class DecodingContext(object):
+    """The state of one decoding job of a `Decoder`: the input, the stack
+    of entered constructed types and the peeked header. See
+    `Decoder.context`."""
+
+    __slots__ = ('data', 'stack', 'header')
+
+    def __init__(self, data=None, stack=None, header=None):  # type: (any, list, tuple) -> None
+        """Constructor."""
+        self.data = data
+        self.stack = stack
+        self.header = header
+
+
+class Decoder(object):
+    """ASN.1 decoder. Understands BER (and DER which is a subset).
+
+    A decoder is not thread-safe, but all of its state belongs to the
+    current decoding job, which can be saved and restored as a
+    `DecodingContext`. Use a `DecoderPool` to reuse decoders across
+    threads.
+    """
+
+    def __init__(self, encoding=DEFAULT_ENCODING):  # type: (str) -> None
+        """Constructor.
+
+        Args:
+            encoding (str): Encoding of the 8-bit character string types.
+        """
+        self.encoding = encoding
+        self.m_data = None
         self.m_stack = None
-        self.m_tag = None
+        self.m_header = None
 
     def start(self, data):  # type: (bytes) -> None
         """This method instructs the decoder to start decoding the ASN.1 input
-        ``data``, which must be a passed in as plain Python bytes.
-        This method may be called at any time to start a new decoding job.
-        If this method is called while currently decoding another input, that
-        decoding context is discarded.
+        ``data``. This method may be called at any time to start a new
+        decoding job. If this method is called while currently decoding
+        another input, that decoding context is discarded.
 
         Note:
             It is not necessary to specify the encoding because the decoder
             assumes the input is in BER or DER format.
 
+        Note:
+            The input is never copied. Constructed types are entered by
+            offset arithmetic on the one input buffer, and only the values of
+            primitive tags are copied out when they are read.
+
         Args:
             data (bytes): ASN.1 input, in BER or DER format, to be decoded.
+                Any bytes-like object, an ``mmap`` or a seekable binary file
+                is accepted, see `open_source()`.
 
         Returns:
             None
@@ -389,10 +659,56 @@ class Decoder(object):
         Raises:
             `Error`
         """
-        if not isinstance(data, bytes):
-            raise Error('Expecting bytes instance.')
-        self.m_stack = [[0, bytes(data)]]
-        self.m_tag = None
+        self.m_data = open_source(data)
+        self.m_stack = [[0, len(self.m_data), False]]
+        self.m_header = None
+
+    @property
+    def context(self):  # type: () -> DecodingContext
+        """A snapshot of the current decoding job. Later reads do not change
+        it, so it can be resumed, as often as needed and by any decoder,
+        with `Decoder.restore()`."""
+        return DecodingContext(self.m_data, [list(frame) for frame in self.m_stack], self.m_header)
+
+    def restore(self, context):  # type: (DecodingContext) -> None
+        """This method resumes the decoding job ``context``, which was
+        taken from `Decoder.context`.
+
+        Args:
+            context (DecodingContext): The decoding job to resume.
+
+        Returns:
+            None
+        """
+        self.m_data = context.data
+        self.m_stack = [list(frame) for frame in context.stack]
+        self.m_header = context.header
+
+    @contextlib.contextmanager
+    def decoding(self, data):  # type: (bytes) -> Iterator
+        """This method starts decoding ``data`` as a nested job, e.g. for
+        content encapsulated in a value of the current job, and resumes the
+        current job when the ``with`` block is left.
+
+        Args:
+            data (bytes): ASN.1 input, see `Decoder.start()`.
+
+        Returns:
+            Context manager returning the decoder.
+        """
+        saved = self.context
+        self.start(data)
+        try:
+            yield self
+        finally:
+            self.restore(saved)
+
+    def reset(self):  # type: () -> None
+        """This method discards the current decoding job and its reference
+        to the input."""
+        self.m_data = None
+        self.m_stack = None
+        self.m_header = None
 
     def peek(self):  # type: () -> Tag
         """This method returns the current ASN.1 tag (i.e. the tag that a
@@ -420,9 +736,10 @@ class Decoder(object):
             raise Error('No input selected. Call start() first.')
         if self._end_of_input():
             return None
-        if self.m_tag is None:
-            self.m_tag = self._read_tag()
-        return self.m_tag
+        if self.m_header is None:
+            frame = self.m_stack[-1]
+            self.m_header = read_header(self.m_data, frame[0], frame[1])
+        return self.m_header[0]
 
     def read(self, tagnr=None):  # type: (Number) -> (Tag, any)
         """This method decodes one ASN.1 tag from the input and returns it as a
@@ -446,8 +763,13 @@ class Decoder(object):
         length = self._read_length()
         if tagnr is None:
             tagnr = tag.nr
-        value = self._read_value(tag.cls, tagnr, length)
-        self.m_tag = None
+        if tag.typ == Types.Constructed:
+            value = self._read_constructed(tag.cls, tagnr, length)
+        elif length is None:
+            raise Error('ASN1 syntax error')
+        else:
+            value = self._read_value(tag.cls, tagnr, length)
+        self.m_header = None
         return tag, value
 
     def eof(self):  # type: () -> bool
@@ -475,9 +797,14 @@ class Decoder(object):
         if tag.typ != Types.Constructed:
             raise Error('Cannot enter a non-constructed tag.')
         length = self._read_length()
-        bytes_data = self._read_bytes(length)
-        self.m_stack.append([0, bytes_data])
-        self.m_tag = None
+        frame = self.m_stack[-1]
+        index = frame[0]
+        if length is None:
+            self.m_stack.append([index, frame[1], True])
+        else:
+            self._read_bytes_count(length)
+            self.m_stack.append([index, index + length, False])
+        self.m_header = None
 
     def leave(self):  # type: () -> None
         """This method leaves the last constructed type that was
@@ -494,188 +821,1084 @@ class Decoder(object):
             raise Error('No input selected. Call start() first.')
         if len(self.m_stack) == 1:
             raise Error('Tag stack is empty.')
-        del self.m_stack[-1]
-        self.m_tag = None
-
-    def _read_tag(self):  # type: () -> Tag
-        """Read a tag from the input."""
-        byte = self._read_byte()
-        cls = byte & 0xc0
-        typ = byte & 0x20
-        nr = byte & 0x1f
-        if nr == 0x1f:  # Long form of tag encoding
-            nr = 0
-            while True:
-                byte = self._read_byte()
-                nr = (nr << 7) | (byte & 0x7f)
-                if not byte & 0x80:
-                    break
-        return Tag(nr=nr, typ=typ, cls=cls)
+        frame = self.m_stack[-1]
+        if frame[2]:
+            if self.m_header is not None:
+                self._skip_value()
+            end = end_of_contents(self.m_data, frame[0], frame[1])
+            del self.m_stack[-1]
+            self.m_stack[-1][0] = end
+        else:
+            del self.m_stack[-1]
+        self.m_header = None
 
     def _read_length(self):  # type: () -> int
-        """Read a length from the input."""
-        byte = self._read_byte()
-        if byte & 0x80:
-            count = byte & 0x7f
-            if count == 0x7f:
-                raise Error('ASN1 syntax error')
-            bytes_data = self._read_bytes(count)
-            length = 0
-            for byte in bytes_data:
-                length = (length << 8) | int(byte)
-            try:
-                length = int(length)
-            except OverflowError:
-                pass
-        else:
-            length = byte
+        """Move past the header read by `Decoder.peek()` and return its
+        length, or ``None`` for the indefinite length form."""
+        tag, content, length = self.m_header
+        self.m_stack[-1][0] = content
         return length
 
+    def walk(self, max_depth=DEFAULT_MAX_DEPTH, max_nodes=DEFAULT_MAX_NODES):  # type: (int, int) -> Iterator
+        """This method walks the remaining input of the current constructed
+        type (or of the whole input at the outermost level) without
+        recursion and yields one ``(event, tag, value)`` tuple per step.
+
+        ``event`` is one of ``START_CONSTRUCTED``, ``PRIMITIVE`` or
+        ``END_CONSTRUCTED``. ``value`` is the decoded value for primitive
+        tags and ``None`` otherwise. The decoding offset is advanced past
+        every top-level element as soon as it has been walked completely.
+
+        Args:
+            max_depth (int): Maximum nesting depth below the current level.
+
+            max_nodes (int): Maximum number of elements to walk.
+
+        Returns:
+            Iterator of ``(event, tag, value)`` tuples.
+
+        Raises:
+            `Error`
+        """
+        if self.m_stack is None:
+            raise Error('No input selected. Call start() first.')
+        input_data = self.m_data
+        for event, node in self.events(max_depth, max_nodes):
+            value = None
+            if event == PRIMITIVE:
+                start = node.offset + node.header_length
+                bytes_data = bytes(input_data[start:start + node.length])
+                value = self._decode_value(node.tag.cls, node.tag.nr, bytes_data)
+            yield event, node.tag, value
+
+    def events(self, max_depth=DEFAULT_MAX_DEPTH, max_nodes=DEFAULT_MAX_NODES):  # type: (int, int) -> Iterator
+        """This method streams the remaining input of the current constructed
+        type (or of the whole input at the outermost level) as SAX-style
+        ``(event, node)`` tuples, see `Walker`. No values are decoded or
+        copied: ``node`` carries absolute offsets into the input, which makes
+        it possible to scan large inputs in constant memory.
+
+        The decoding offset is advanced past every top-level element as
+        soon as it has been walked completely.
+
+        Args:
+            max_depth (int): Maximum nesting depth below the current level.
+
+            max_nodes (int): Maximum number of elements to walk.
+
+        Returns:
+            Iterator of ``(event, node)`` tuples.
+
+        Raises:
+            `Error`
+        """
+        if self.m_stack is None:
+            raise Error('No input selected. Call start() first.')
+        frame = self.m_stack[-1]
+        index, end, indefinite = frame
+        if self.m_header is not None:
+            raise Error('Cannot stream events after peek().')
+        for event, node in Walker(self.m_data, index, end, max_depth, max_nodes, indefinite=indefinite):
+            if node.depth == 0 and event != START_CONSTRUCTED:
+                frame[0] = node.end
+            yield event, node
+
     def _read_value(self, cls, nr, length):  # type: (int, int, int) -> any
         """Read a value from the input."""
         bytes_data = self._read_bytes(length)
-        if cls != Classes.Universal:
-            value = bytes_data
-        elif nr == Numbers.Boolean:
-            value = self._decode_boolean(bytes_data)
-        elif nr in (Numbers.Integer, Numbers.Enumerated):
-            value = self._decode_integer(bytes_data)
-        elif nr == Numbers.OctetString:
-            value = self._decode_octet_string(bytes_data)
-        elif nr == Numbers.Null:
-            value = self._decode_null(bytes_data)
-        elif nr == Numbers.ObjectIdentifier:
-            value = self._decode_object_identifier(bytes_data)
-        elif nr in (Numbers.PrintableString, Numbers.IA5String,
-                    Numbers.UTF8String, Numbers.UTCTime,
-                    Numbers.GeneralizedTime):
-            value = self._decode_printable_string(bytes_data)
-        elif nr == Numbers.BitString:
-            value = self._decode_bitstring(bytes_data)
+        return self._decode_value(cls, nr, bytes_data)
+
+    def _read_constructed(self, cls, nr, length):  # type: (int, int, int) -> any
+        """Read the value of a constructed tag from the input. The segments
+        of a constructed string are chained in a `BufferChain` instead of
+        being joined."""
+        segmented = cls == Classes.Universal and nr in string_numbers
+        if length is not None and not segmented:
+            return self._read_value(cls, nr, length)
+        frame = self.m_stack[-1]
+        index = frame[0]
+        if length is None:
+            end = frame[1]
         else:
-            value = bytes_data
-        return value
+            end = index + length
+            if end > frame[1]:
+                raise Error('Premature end of input.')
+        if not segmented:
+            frame[0] = end_of_contents(self.m_data, index, end)
+            return self._decode_value(cls, nr, bytes(self.m_data[index:frame[0] - 2]))
+        segments, frame[0] = read_segments(self.m_data, index, end, length is None)
+        if nr == Numbers.BitString:
+            segments = self._bitstring_segments(segments)
+        return self._decode_value(cls, nr, BufferChain(segments))
 
-    def _read_byte(self):  # type: () -> int
-        """Return the next input byte, or raise an error on end-of-input."""
-        index, input_data = self.m_stack[-1]
-        try:
-            byte = input_data[index]
-        except IndexError:
-            raise Error('Premature end of input.')
-        self.m_stack[-1][0] += 1
-        return byte
+    def _skip_value(self):  # type: () -> None
+        """Skip the length and the content of a tag whose tag octets have
+        already been read."""
+        length = self._read_length()
+        if length is None:
+            frame = self.m_stack[-1]
+            frame[0] = end_of_contents(self.m_data, frame[0], frame[1])
+        else:
+            self._read_bytes_count(length)
+
+    @staticmethod
+    def _bitstring_segments(segments):  # type: (list) -> list
+        """Strip the unused bits octet from each segment of a constructed
+        bit string and put the one of the last segment in front."""
+        unused = 0
+        chain = [None]
+        for segment in segments:
+            if len(segment) == 0 or unused:
+                raise Error('ASN1 syntax error')
+            unused = segment[0]
+            chain.append(segment[1:])
+        chain[0] = bytes((unused,))
+        return chain
+
+    def _decode_value(self, cls, nr, bytes_data):  # type: (int, int, bytes) -> any
+        """Decode the value of a primitive tag with the function registered
+        for ``(cls, nr)`` in `Decoder.value_decoders`. Tags without one
+        decode to their content octets."""
+        decode = self.value_decoders.get((cls, nr))
+        if decode is None:
+            return bytes_data
+        return decode(self, nr, bytes_data)
 
     def _read_bytes(self, count):  # type: (int) -> bytes
         """Return the next ``count`` bytes of input. Raise error on
         end-of-input."""
-        index, input_data = self.m_stack[-1]
-        bytes_data = input_data[index:index + count]
-        if len(bytes_data) != count:
+        index = self._read_bytes_count(count)
+        return bytes(self.m_data[index:index + count])
+
+    def _read_bytes_count(self, count):  # type: (int) -> int
+        """Skip the next ``count`` bytes of input and return the offset they
+        start at. Raise error on end-of-input."""
+        frame = self.m_stack[-1]
+        index = frame[0]
+        if index + count > frame[1]:
             raise Error('Premature end of input.')
-        self.m_stack[-1][0] += count
-        return bytes_data
+        frame[0] = index + count
+        return index
 
     def _end_of_input(self):  # type: () -> bool
         """Return True if we are at the end of input."""
-        index, input_data = self.m_stack[-1]
-        assert not index > len(input_data)
-        return index == len(input_data)
-
-    @staticmethod
-    def _decode_boolean(bytes_data):  # type: (bytes) -> bool
+        index, end, indefinite = self.m_stack[-1]
+        assert not index > end
+        if indefinite and self.m_header is None:
+            if self.m_data[index:index + 2] == END_OF_CONTENTS:
+                return True
+            if index == end:
+                raise Error('Premature end of input.')
+        return index == end
+
+    def _decode_boolean(self, nr, bytes_data):  # type: (int, bytes) -> bool
         """Decode a boolean value."""
-        if len(bytes_data) != 1:
-            raise Error('ASN1 syntax error')
-        if bytes_data[0] == 0:
-            return False
-        return True
+        return decode_boolean(bytes_data)
 
-    @staticmethod
-    def _decode_integer(bytes_data):  # type: (bytes) -> int
+    def _decode_integer(self, nr, bytes_data):  # type: (int, bytes) -> int
         """Decode an integer value."""
-        values = [int(b) for b in bytes_data]
-        # check if the integer is normalized
-        if len(values) > 1 and (values[0] == 0xff and values[1] & 0x80 or values[0] == 0x00 and not (values[1] & 0x80)):
-            raise Error('ASN1 syntax error')
-        negative = values[0] & 0x80
-        if negative:
-            # make positive by taking two's complement
-            for i in range(len(values)):
-                values[i] = 0xff - values[i]
-            for i in range(len(values) - 1, -1, -1):
-                values[i] += 1
-                if values[i] <= 0xff:
-                    break
-                assert i > 0
-                values[i] = 0x00
-        value = 0
-        for val in values:
-            value = (value << 8) | val
-        if negative:
-            value = -value
-        try:
-            value = int(value)
-        except OverflowError:
-            pass
-        return value
+        return decode_integer(bytes_data)
 
-    @staticmethod
-    def _decode_octet_string(bytes_data):  # type: (bytes) -> bytes
+    def _decode_octet_string(self, nr, bytes_data):  # type: (int, bytes) -> bytes
         """Decode an octet string."""
         return bytes_data
 
-    @staticmethod
-    def _decode_null(bytes_data):  # type: (bytes) -> any
+    def _decode_null(self, nr, bytes_data):  # type: (int, bytes) -> any
         """Decode a Null value."""
-        if len(bytes_data) != 0:
-            raise Error('ASN1 syntax error')
-        return None
+        return decode_null(bytes_data)
 
-    @staticmethod
-    def _decode_object_identifier(bytes_data):  # type: (bytes) -> str
+    def _decode_object_identifier(self, nr, bytes_data):  # type: (int, bytes) -> str
         """Decode an object identifier."""
-        result = []
-        value = 0
-        for i in range(len(bytes_data)):
-            byte = int(bytes_data[i])
+        return decode_object_identifier(bytes_data)
+
+    def _decode_printable_string(self, nr, bytes_data):  # type: (int, bytes) -> str
+        """Decode a character string."""
+        return decode_string(nr, bytes_data, self.encoding)
+
+    def _decode_bitstring(self, nr, bytes_data):  # type: (int, bytes) -> bytes
+        """Decode a bitstring."""
+        return decode_bit_string(bytes_data)[0]
+
+    value_decoders = {
+        (Classes.Universal, Numbers.Boolean): _decode_boolean,
+        (Classes.Universal, Numbers.Integer): _decode_integer,
+        (Classes.Universal, Numbers.Enumerated): _decode_integer,
+        (Classes.Universal, Numbers.BitString): _decode_bitstring,
+        (Classes.Universal, Numbers.OctetString): _decode_octet_string,
+        (Classes.Universal, Numbers.Null): _decode_null,
+        (Classes.Universal, Numbers.ObjectIdentifier): _decode_object_identifier,
+        (Classes.Universal, Numbers.UTF8String): _decode_printable_string,
+        (Classes.Universal, Numbers.PrintableString): _decode_printable_string,
+        (Classes.Universal, Numbers.IA5String): _decode_printable_string,
+        (Classes.Universal, Numbers.UTCTime): _decode_printable_string,
+        (Classes.Universal, Numbers.GeneralizedTime): _decode_printable_string,
+    }
+    """Functions that decode the content octets of primitive tags, indexed
+    by ``(cls, nr)``. See `register_decoder()`."""
+
+
+def register_decoder(cls, nr, function, table=None):  # type: (int, int, any, dict) -> None
+    """Register the function that decodes the content octets of primitive
+    tags of class ``cls`` and number ``nr``.
+
+    The function is called as ``function(decoder, nr, bytes_data)`` and
+    returns the decoded value. Use this to decode context specific, private
+    or application specific tags, such as the GOST specific parts of a key
+    container, or to change how a universal type is decoded. Raise `Error`
+    for malformed content.
+
+    Args:
+        cls (int): The tag class. Use ``Classes`` enumeration.
+
+        nr (int): The tag number. Use ``Numbers`` enumeration for universal
+            tags.
+
+        function (callable): The decoder, or None to remove the registered
+            one so that the tag decodes to its content octets.
+
+        table (dict): The table to register in. Defaults to
+            `Decoder.value_decoders`, which every decoder shares.
+
+    Returns:
+        None
+    """
+    if table is None:
+        table = Decoder.value_decoders
+    if function is None:
+        table.pop((cls, nr), None)
+    else:
+        table[cls, nr] = function
+
+
+def decode_boolean(bytes_data):  # type: (bytes) -> bool
+    """Decode the content octets of a BOOLEAN value.
+
+    Raises:
+        `Error`
+    """
+    if len(bytes_data) != 1:
+        raise Error('ASN1 syntax error')
+    return bytes_data[0] != 0
+
+
+def decode_null(bytes_data):  # type: (bytes) -> None
+    """Check the content octets of a NULL value, which must be empty.
+
+    Raises:
+        `Error`
+    """
+    if len(bytes_data) != 0:
+        raise Error('ASN1 syntax error')
+    return None
+
+
+def decode_string(nr, bytes_data, encoding=DEFAULT_ENCODING):  # type: (int, bytes, str) -> str
+    """Decode the content octets of the character string type ``nr``.
+    UTF8String is decoded as UTF-8, the other types with ``encoding``.
+
+    Raises:
+        `Error`
+    """
+    if nr == Numbers.UTF8String:
+        encoding = 'utf-8'
+    try:
+        return bytes_data.decode(encoding)
+    except UnicodeDecodeError as e:
+        raise Error(f'Invalid character string: {e}') from e
+
+
+def decode_bit_string(bytes_data):  # type: (bytes) -> (bytes, int)
+    """Decode the content octets of a BIT STRING value.
+
+    Returns:
+        bytes, int: The bits, shifted right so that the unused bits are
+        dropped, and the number of unused bits.
+
+    Raises:
+        `Error`
+    """
+    if len(bytes_data) == 0:
+        raise Error('ASN1 syntax error')
+
+    num_unused_bits = bytes_data[0]
+    if not (0 <= num_unused_bits <= 7):
+        raise Error('ASN1 syntax error')
+
+    if num_unused_bits == 0:
+        return bytes_data[1:], 0
+
+    # Shift off unused bits
+    remaining = bytearray(bytes_data[1:])
+    bitmask = (1 << num_unused_bits) - 1
+    removed_bits = 0
+
+    for i in range(len(remaining)):
+        byte = int(remaining[i])
+        remaining[i] = (byte >> num_unused_bits) | (removed_bits << num_unused_bits)
+        removed_bits = byte & bitmask
+
+    return bytes(remaining), num_unused_bits
+
+
+def decode_integer(bytes_data):  # type: (bytes) -> int
+    """Decode the content octets of an INTEGER or ENUMERATED value.
+
+    Raises:
+        `Error`: If the value is empty or not minimally encoded.
+    """
+    if not bytes_data:
+        raise Error('ASN1 syntax error')
+    # check if the integer is normalized
+    if len(bytes_data) > 1 and (bytes_data[0] == 0xff and bytes_data[1] & 0x80 or
+                                bytes_data[0] == 0x00 and not (bytes_data[1] & 0x80)):
+        raise Error('ASN1 syntax error')
+    return int.from_bytes(bytes_data, 'big', signed=True)
+
+
+_oid_first_arcs = tuple('{}.{}'.format(value // 40, value % 40) for value in range(1600))
+_oid_arcs = tuple(str(value) for value in range(128))
+OID_CACHE_SIZE = 4096
+
+
+class ObjectIdentifier(str):
+    """A dotted object identifier string that also carries its DER content
+    octets (``der``) and a descriptive ``name`` (``None`` if unknown).
+    Instances are shared through `OidRegistry`, so equal OIDs decoded from
+    different inputs are the same object.
+    """
+
+    def __new__(cls, dotted, der, name=None):  # type: (str, bytes, str) -> ObjectIdentifier
+        oid = super(ObjectIdentifier, cls).__new__(cls, dotted)
+        oid.der = der
+        oid.name = name
+        return oid
+
+    def __reduce__(self):
+        return ObjectIdentifier, (str(self), self.der, self.name)
+
+
+class OidRegistry(object):
+    """Object identifiers indexed by their DER content octets.
+
+    Registered OIDs are kept for the lifetime of the registry. OIDs that are
+    decoded but not registered are cached up to ``cache_size`` entries.
+    Looking up the content octets of an OBJECT IDENTIFIER is a single dict
+    access that skips decoding entirely.
+    """
+
+    def __init__(self, cache_size=OID_CACHE_SIZE):  # type: (int) -> None
+        """Constructor."""
+        self.m_known = {}
+        self.m_names = {}
+        self.m_decoded = {}
+        self.cache_size = cache_size
+
+    def register(self, dotted, name):  # type: (str, str) -> ObjectIdentifier
+        """Register ``dotted`` under ``name`` and return its shared
+        `ObjectIdentifier`."""
+        der = Encoder()._encode_object_identifier(Numbers.ObjectIdentifier, dotted)
+        oid = self.m_decoded.pop(der, None) or self.m_known.get(der)
+        if oid is None:
+            oid = ObjectIdentifier(dotted, der)
+        oid.name = name
+        self.m_known[der] = oid
+        self.m_names[str(dotted)] = oid
+        return oid
+
+    def update(self, names):  # type: (dict) -> None
+        """Register every ``dotted: name`` pair of ``names``."""
+        for dotted, name in names.items():
+            self.register(dotted, name)
+
+    def lookup(self, der):  # type: (bytes) -> ObjectIdentifier
+        """Return the `ObjectIdentifier` for the content octets ``der``, or
+        ``None`` if it has not been registered or decoded yet."""
+        try:
+            oid = self.m_known.get(der)
+        except TypeError:
+            der = bytes(der)
+            oid = self.m_known.get(der)
+        if oid is None:
+            oid = self.m_decoded.get(der)
+        return oid
+
+    def decode(self, der):  # type: (bytes) -> ObjectIdentifier
+        """Return the shared `ObjectIdentifier` for the content octets
+        ``der``, decoding it on first use.
+
+        Raises:
+            `Error`
+        """
+        oid = self.lookup(der)
+        if oid is not None:
+            return oid
+        der = bytes(der)
+        oid = ObjectIdentifier(_decode_object_identifier(der), der)
+        if len(self.m_decoded) >= self.cache_size:
+            self.m_decoded.clear()
+        self.m_decoded[der] = oid
+        return oid
+
+    def name(self, dotted):  # type: (str) -> str
+        """Return the registered name of ``dotted``, or ``dotted`` itself."""
+        oid = self.m_names.get(dotted)
+        if oid is None:
+            return dotted
+        return oid.name
+
+    def names(self):  # type: () -> dict
+        """Return a ``dotted: name`` dict of all registered OIDs."""
+        return {dotted: oid.name for dotted, oid in self.m_names.items()}
+
+
+oids = OidRegistry()
+"""The default `OidRegistry` used by `decode_object_identifier()`."""
+
+
+def decode_object_identifier(bytes_data):  # type: (bytes) -> str
+    """Decode the content octets of an OBJECT IDENTIFIER into a shared
+    `ObjectIdentifier` from the default registry ``oids``. Repeated OIDs
+    are returned without decoding.
+
+    Raises:
+        `Error`
+    """
+    return oids.decode(bytes_data)
+
+
+def _decode_object_identifier(bytes_data):  # type: (bytes) -> str
+    """Decode the content octets of an OBJECT IDENTIFIER into a dotted
+    string."""
+    result = []
+    value = 0
+    for byte in bytes_data:
+        if byte & 0x80:
             if value == 0 and byte == 0x80:
                 raise Error('ASN1 syntax error')
             value = (value << 7) | (byte & 0x7f)
+        else:
+            result.append((value << 7) | byte)
+            value = 0
+    if len(result) == 0 or result[0] > 1599:
+        raise Error('ASN1 syntax error')
+    arcs = [_oid_first_arcs[result[0]]]
+    for value in result[1:]:
+        arcs.append(_oid_arcs[value] if value < 128 else str(value))
+    return sys.intern('.'.join(arcs))
+
+
+class DecoderPool(object):
+    """Thread-safe pool of reusable decoders.
+
+    `DecoderPool.acquire()` hands out an idle decoder or creates a new one,
+    so concurrent callers never share a decoder. `DecoderPool.release()`
+    resets it and keeps up to ``max_idle`` decoders for reuse.
+    """
+
+    def __init__(self, factory=Decoder, max_idle=16):  # type: (callable, int) -> None
+        """Constructor."""
+        self.factory = factory
+        self.max_idle = max_idle
+        self.m_idle = []
+        self.m_lock = threading.Lock()
+
+    def acquire(self):  # type: () -> Decoder
+        """Return a decoder for the exclusive use of the caller."""
+        with self.m_lock:
+            if self.m_idle:
+                return self.m_idle.pop()
+        return self.factory()
+
+    def release(self, decoder):  # type: (Decoder) -> None
+        """Return ``decoder`` to the pool. It must not be used afterwards."""
+        decoder.reset()
+        with self.m_lock:
+            if len(self.m_idle) < self.max_idle:
+                self.m_idle.append(decoder)
+
+    @contextlib.contextmanager
+    def decoder(self, data=None):  # type: (bytes) -> Iterator
+        """Acquire a decoder for the ``with`` block, started on ``data``
+        unless it is ``None``."""
+        decoder = self.acquire()
+        try:
+            if data is not None:
+                decoder.start(data)
+            yield decoder
+        finally:
+            self.release(decoder)
+
+
+decoders = DecoderPool()
+
+
+class FileSource(object):
+    """Random access to a seekable binary file through a fixed-size read
+    window, so that `Walker` can scan files of any size in constant memory.
+    Supports ``len()``, indexing and slicing like ``bytes``.
+    """
+
+    def __init__(self, fileobj, window=65536):  # type: (io.BufferedIOBase, int) -> None
+        """Constructor."""
+        fileobj.seek(0, io.SEEK_END)
+        self.m_file = fileobj
+        self.m_size = fileobj.tell()
+        self.m_window = window
+        self.m_start = 0
+        self.m_buffer = b''
+
+    def __len__(self):  # type: () -> int
+        return self.m_size
+
+    def __getitem__(self, key):  # type: (int | slice) -> int | bytes
+        if isinstance(key, slice):
+            start, stop, _ = key.indices(self.m_size)
+            if stop <= start:
+                return b''
+            if start < self.m_start or stop > self.m_start + len(self.m_buffer):
+                if stop - start > self.m_window:
+                    self.m_file.seek(start)
+                    return self.m_file.read(stop - start)
+                self._fill(start)
+            return self.m_buffer[start - self.m_start:stop - self.m_start]
+        if key < 0:
+            key += self.m_size
+        if not 0 <= key < self.m_size:
+            raise IndexError('index out of range')
+        if not self.m_start <= key < self.m_start + len(self.m_buffer):
+            self._fill(key)
+        return self.m_buffer[key - self.m_start]
+
+    def _fill(self, offset):  # type: (int) -> None
+        """Load the read window starting at ``offset``."""
+        self.m_file.seek(offset)
+        self.m_start = offset
+        self.m_buffer = self.m_file.read(self.m_window)
+
+
+def open_source(source):  # type: (any) -> memoryview | FileSource
+    """Return an indexable view of ``source`` without copying it.
+
+    Bytes-like objects and ``mmap`` objects are wrapped in a ``memoryview``.
+    Binary files are memory mapped when possible and otherwise read through
+    a `FileSource` window.
+
+    Raises:
+        `Error`
+    """
+    if isinstance(source, (memoryview, FileSource)):
+        return source
+    if isinstance(source, (bytes, bytearray, mmap.mmap)):
+        return memoryview(source)
+    if hasattr(source, 'read') and hasattr(source, 'seek'):
+        try:
+            return memoryview(mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ))
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            return FileSource(source)
+    raise Error('Expecting bytes instance.')
+
+
+def iter_events(source, offset=0, end=None, max_depth=DEFAULT_MAX_DEPTH,
+                max_nodes=DEFAULT_MAX_NODES):  # type: (any, int, int, int, int) -> Walker
+    """Stream ``source`` as SAX-style ``(event, node)`` tuples, see `Walker`.
+    ``source`` may be anything accepted by `open_source()`."""
+    return Walker(open_source(source), offset, end, max_depth, max_nodes)
+
+
+def read_header(data, offset, end):  # type: (bytes, int, int) -> (Tag, int, int)
+    """Read the tag and length at ``data[offset]`` without copying any
+    content.
+
+    Returns:
+        `Tag`, int, int: The tag, the offset of the content and its length.
+        The length is ``None`` for the indefinite length form.
+
+    Raises:
+        `Error`
+    """
+    header = peek_header(data, offset, end)
+    if header is None:
+        raise Error('Premature end of input.')
+    length = header[2]
+    if length is not None and header[1] + length > end:
+        raise Error('Premature end of input.')
+    return header
+
+
+def peek_header(data, offset, end):  # type: (bytes, int, int) -> (Tag, int, int)
+    """Read the tag and length at ``data[offset]`` like `read_header()`,
+    but return ``None`` instead of raising when ``data[offset:end]`` ends
+    inside the header. The content itself is not required to be present.
+
+    Returns:
+        `Tag`, int, int: The tag, the offset of the content and its length
+        (``None`` for the indefinite length form), or ``None``.
+
+    Raises:
+        `Error`
+    """
+    if offset >= end:
+        return None
+    byte = data[offset]
+    offset += 1
+    cls = byte & 0xc0
+    typ = byte & 0x20
+    nr = byte & 0x1f
+    if nr == 0x1f:  # Long form of tag encoding
+        nr = 0
+        while True:
+            if offset >= end:
+                return None
+            byte = data[offset]
+            offset += 1
+            nr = (nr << 7) | (byte & 0x7f)
             if not byte & 0x80:
-                result.append(value)
-                value = 0
-        if len(result) == 0 or result[0] > 1599:
+                break
+    if offset >= end:
+        return None
+    length = data[offset]
+    offset += 1
+    if length & 0x80:
+        count = length & 0x7f
+        if count == 0x7f:
             raise Error('ASN1 syntax error')
-        result = [result[0] // 40, result[0] % 40] + result[1:]
-        result = list(map(str, result))
-        return str('.'.join(result))
+        if count == 0:
+            return Tag(nr=nr, typ=typ, cls=cls), offset, None
+        if offset + count > end:
+            return None
+        length = int.from_bytes(data[offset:offset + count], 'big')
+        offset += count
+    return Tag(nr=nr, typ=typ, cls=cls), offset, length
 
-    @staticmethod
-    def _decode_printable_string(bytes_data):
-        return bytes_data.decode('cp1251')
 
-    @staticmethod
-    def _decode_bitstring(bytes_data):  # type: (bytes) -> str
-        """Decode a bitstring."""
-        if len(bytes_data) == 0:
-            raise Error('ASN1 syntax error')
+encapsulated_tag_prefixes = {
+    Numbers.BitString: b'\x00',
+    Numbers.OctetString: b''
+}
+"""Universal primitive types whose content may encapsulate DER, mapped to
+the octets that precede the encapsulated elements."""
+
 
-        num_unused_bits = bytes_data[0]
-        if not (0 <= num_unused_bits <= 7):
+def _read_tlv_header(data, offset, end):  # type: (bytes, int, int) -> (int, int, int)
+    """Read a complete, definite-length header at ``data[offset]`` and
+    return its type, content offset and length, or ``None``."""
+    if offset >= end or data[offset] == 0x00:
+        return None
+    try:
+        header = peek_header(data, offset, end)
+    except Error:
+        return None
+    if header is None:
+        return None
+    tag, offset, length = header
+    if length is None or offset + length > end:
+        return None
+    return tag.typ, offset, length
+
+
+def is_encapsulated(data, offset, end):  # type: (bytes, int, int) -> bool
+    """Check that ``data[offset:end]`` is a complete run of well-formed
+    definite-length elements."""
+    if offset >= end:
+        return False
+    stack = [end]
+    while stack:
+        end = stack[-1]
+        if offset == end:
+            stack.pop()
+            continue
+        header = _read_tlv_header(data, offset, end)
+        if header is None:
+            return False
+        typ, offset, length = header
+        if typ == Types.Constructed:
+            stack.append(offset + length)
+        else:
+            offset += length
+    return True
+
+
+def encapsulated_start(data, tag, start, end, prefixes=encapsulated_tag_prefixes):
+    # type: (bytes, Tag, int, int, dict) -> int
+    """Return the offset of the elements encapsulated in the content
+    ``data[start:end]`` of a primitive element with tag ``tag``, or ``None``
+    if the content does not look like encapsulated DER."""
+    if tag.cls != Classes.Universal:
+        return None
+    prefix = prefixes.get(tag.nr)
+    if prefix is None:
+        return None
+    if data[start:start + len(prefix)] != prefix:
+        return None
+    start += len(prefix)
+    if not is_encapsulated(data, start, end):
+        return None
+    return start
+
+
+class Walker(object):
+    """Explicit-stack walker over the ASN.1 elements in ``data[offset:end]``.
+
+    The walker yields ``(event, node)`` tuples, where ``event`` is one of
+    ``START_CONSTRUCTED``, ``PRIMITIVE`` or ``END_CONSTRUCTED`` and ``node``
+    is a `Node` with absolute offsets into ``data``. Nesting is tracked on
+    an explicit stack, so deeply nested input cannot exhaust the Python
+    recursion limit, and the walk is bounded by ``max_depth`` and
+    ``max_nodes``.
+
+    The optional ``descend`` callable is called with every primitive
+    `Node`. If it returns an offset, the content from that offset to the
+    end of the node is walked as nested elements (e.g. encapsulated
+    BIT STRING content), bracketed by start and end events for the node.
+
+    Constructed elements with the BER indefinite length form are walked up
+    to their end-of-contents octets, see `Node`. With ``indefinite`` set,
+    ``data[offset:end]`` is itself indefinite-length content and the walk
+    stops at its end-of-contents octets without consuming them.
+    """
+
+    def __init__(self, data, offset=0, end=None, max_depth=DEFAULT_MAX_DEPTH, max_nodes=DEFAULT_MAX_NODES,
+                 descend=None, indefinite=False):  # type: (bytes, int, int, int, int, callable, bool) -> None
+        """Constructor."""
+        if end is None:
+            end = len(data)
+        self.m_data = data
+        self.m_index = offset
+        self.m_ends = [end]
+        self.m_eoc = [indefinite]
+        self.m_open = []
+        self.m_count = 0
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.descend = descend
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):  # type: () -> (str, Node)
+        end = self.m_ends[-1]
+        index = self.m_index
+        if self.m_eoc[-1]:
+            if self.m_data[index:index + 2] == END_OF_CONTENTS:
+                if not self.m_open:
+                    raise StopIteration
+                return self._end_of_contents(index)
+            if index == end:
+                raise Error('Premature end of input.')
+        elif index == end:
+            if not self.m_open:
+                raise StopIteration
+            del self.m_ends[-1]
+            del self.m_eoc[-1]
+            return END_CONSTRUCTED, self.m_open.pop()
+        tag, content, length = read_header(self.m_data, index, end)
+        depth = len(self.m_open)
+        if depth >= self.max_depth:
+            raise Error('Maximum nesting depth exceeded.')
+        self.m_count += 1
+        if self.m_count > self.max_nodes:
+            raise Error('Maximum number of nodes exceeded.')
+        node = Node(tag, index, content - index, length, depth, length is None)
+        start = None
+        if tag.typ == Types.Constructed:
+            start = content
+        elif length is None:
             raise Error('ASN1 syntax error')
+        elif self.descend is not None:
+            start = self.descend(node)
+        if start is None:
+            self.m_index = content + length
+            return PRIMITIVE, node
+        self.m_index = start
+        if length is None:
+            self.m_ends.append(end)
+            self.m_eoc.append(True)
+        else:
+            self.m_ends.append(content + length)
+            self.m_eoc.append(False)
+        self.m_open.append(node)
+        return START_CONSTRUCTED, node
+
+    def _end_of_contents(self, index):  # type: (int) -> (str, Node)
+        """Close the open indefinite-length node at the end-of-contents
+        octets at ``index``."""
+        del self.m_ends[-1]
+        del self.m_eoc[-1]
+        node = self.m_open.pop()
+        self.m_index = index + 2
+        return END_CONSTRUCTED, node._replace(length=self.m_index - node.offset - node.header_length)
+
+    def abandon(self, depth):  # type: (int) -> None
+        """Stop walking the open node at ``depth`` and everything below it.
+        The walk continues with the next sibling of that node, and no end
+        events are produced for the abandoned nodes."""
+        if len(self.m_open) <= depth:
+            return
+        node = self.m_open[depth]
+        end = self.m_ends[depth + 1]
+        del self.m_open[depth:]
+        del self.m_ends[depth + 1:]
+        del self.m_eoc[depth + 1:]
+        if node.length is None:
+            self.m_index = end_of_contents(self.m_data, node.offset + node.header_length, end)
+        else:
+            self.m_index = node.end
+
+
+def end_of_contents(data, offset, end, max_depth=DEFAULT_MAX_DEPTH,
+                    max_nodes=DEFAULT_MAX_NODES):  # type: (bytes, int, int, int, int) -> int
+    """Find the end of the indefinite-length content that starts at
+    ``data[offset]`` and has to end before ``end``.
+
+    Returns:
+        int: The offset just past the end-of-contents octets.
 
-        if num_unused_bits == 0:
-            return bytes_data[1:]
+    Raises:
+        `Error`
+    """
+    walker = Walker(data, offset, end, max_depth, max_nodes, indefinite=True)
+    for _ in walker:
+        pass
+    return walker.m_index + 2
+
+
+def read_segments(data, offset, end, indefinite=False, max_depth=DEFAULT_MAX_DEPTH,
+                  max_nodes=DEFAULT_MAX_NODES):  # type: (bytes, int, int, bool, int, int) -> (list, int)
+    """Collect the segments of the constructed string whose content is
+    ``data[offset:end]``, or starts at ``data[offset]`` if ``indefinite`` is
+    set. The segments are slices of ``data``, i.e. views into the input if
+    it is a `memoryview`, so nothing is copied for in-memory input.
 
-        # Shift off unused bits
-        remaining = bytearray(bytes_data[1:])
-        bitmask = (1 << num_unused_bits) - 1
-        removed_bits = 0
+    Returns:
+        list, int: The content of the primitive segments in order and the
+        offset just past the content (and its end-of-contents octets).
+
+    Raises:
+        `Error`
+    """
+    walker = Walker(data, offset, end, max_depth, max_nodes, indefinite=indefinite)
+    segments = []
+    for event, node in walker:
+        if event == PRIMITIVE:
+            start = node.offset + node.header_length
+            segments.append(data[start:start + node.length])
+    if indefinite:
+        return segments, walker.m_index + 2
+    return segments, end
+
+
+class BufferChain(object):
+    """Read-only concatenation of byte buffers that are not copied.
+
+    The value of a constructed string is read as the chain of its segments,
+    each of them a view into the input, so that large values can be passed
+    on segment by segment (e.g. to a hash or a file) without joining them.
+    Iterating over the chain yields the segments, ``bytes(chain)`` joins
+    them.
+    """
+
+    __slots__ = ('segments', 'm_length')
+
+    def __init__(self, segments=()):  # type: (Iterable) -> None
+        """Constructor."""
+        self.segments = list(segments)
+        self.m_length = sum(len(segment) for segment in self.segments)
+
+    def __len__(self):  # type: () -> int
+        return self.m_length
+
+    def __iter__(self):  # type: () -> Iterator
+        return iter(self.segments)
+
+    def __bytes__(self):  # type: () -> bytes
+        return b''.join(self.segments)
+
+    def tobytes(self):  # type: () -> bytes
+        """Return the joined content as ``bytes``."""
+        return bytes(self)
+
+    def __getitem__(self, key):  # type: (int | slice) -> int | bytes
+        if isinstance(key, slice):
+            return bytes(self)[key]
+        if key < 0:
+            key += self.m_length
+        if not 0 <= key < self.m_length:
+            raise IndexError('index out of range')
+        for segment in self.segments:
+            if key < len(segment):
+                return segment[key]
+            key -= len(segment)
+
+    def __eq__(self, other):  # type: (object) -> bool
+        if not isinstance(other, (BufferChain, bytes, bytearray, memoryview)):
+            return NotImplemented
+        return len(self) == len(other) and bytes(self) == bytes(other)
+
+    __hash__ = None
+
+    def hex(self):  # type: () -> str
+        """Return the content as a hexadecimal string."""
+        return ''.join(segment.hex() for segment in self.segments)
+
+    def decode(self, encoding='utf-8', errors='strict'):  # type: (str, str) -> str
+        """Decode the joined content like `bytes.decode()`."""
+        return bytes(self).decode(encoding, errors)
+
+    def __repr__(self):  # type: () -> str
+        return 'BufferChain({} segments, {} bytes)'.format(len(self.segments), self.m_length)
+
+
+class IncrementalDecoder(object):
+    """Push-style decoder for input that arrives in chunks.
+
+    Chunks are passed to `IncrementalDecoder.feed()`, which returns the
+    ``(event, node, value)`` tuples that became complete with that chunk.
+    ``event`` and ``node`` are as for `Walker`, with offsets counted from
+    the start of the stream, and ``value`` is the decoded value of
+    primitive tags. A constructed tag is reported as soon as its header is
+    complete; a primitive tag once all of its content has arrived.
+
+    Parsing suspends at an incomplete header or value and resumes there
+    with the next chunk, so no input is scanned twice. Constructed tags
+    with the BER indefinite length form end at their end-of-contents
+    octets, which lets segmented strings of any size stream through. Input that has been
+    reported is dropped from the internal buffer, which therefore only
+    holds the incomplete tail of the stream.
+    """
+
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH, max_nodes=DEFAULT_MAX_NODES):  # type: (int, int) -> None
+        """Constructor."""
+        self.m_buffer = bytearray()
+        self.m_base = 0
+        self.m_index = 0
+        self.m_ends = []
+        self.m_eoc = []
+        self.m_open = []
+        self.m_pending = None
+        self.m_count = 0
+        self.m_closed = False
+        self.m_decoder = Decoder()
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+
+    def feed(self, data):  # type: (bytes) -> list
+        """This method appends ``data`` to the input and decodes as far as
+        the input allows.
+
+        Args:
+            data (bytes): The next chunk of ASN.1 input.
+
+        Returns:
+            list: The ``(event, node, value)`` tuples completed by ``data``.
+
+        Raises:
+            `Error`
+        """
+        if self.m_closed:
+            raise Error('Decoder is closed.')
+        self.m_buffer += data
+        events = []
+        while self._step(events):
+            pass
+        del self.m_buffer[:self.m_index - self.m_base]
+        self.m_base = self.m_index
+        return events
+
+    def close(self):  # type: () -> list
+        """This method signals the end of the input.
+
+        Returns:
+            list: The end events of the constructed tags that are completed
+            by the end of the input.
+
+        Raises:
+            `Error`: If the input ends inside a tag.
+        """
+        events = self.feed(b'')
+        self.m_closed = True
+        if self.m_open or self.m_pending is not None or self.m_buffer:
+            raise Error('Premature end of input.')
+        return events
+
+    def _step(self, events):  # type: (list) -> bool
+        """Decode the next event into ``events``. Return False if more input
+        is needed."""
+        base = self.m_base
+        buffer = self.m_buffer
+        end = None
+        if self.m_open:
+            end = self.m_ends[-1]
+            if self.m_eoc[-1]:
+                index = self.m_index - base
+                if buffer[index:index + 2] == END_OF_CONTENTS:
+                    del self.m_ends[-1]
+                    del self.m_eoc[-1]
+                    node = self.m_open.pop()
+                    self.m_index += 2
+                    node = node._replace(length=self.m_index - node.offset - node.header_length)
+                    events.append((END_CONSTRUCTED, node, None))
+                    return True
+                if buffer[index:] == END_OF_CONTENTS[:1]:
+                    return False
+            if self.m_index == end:
+                if self.m_eoc[-1]:
+                    raise Error('Premature end of input.')
+                del self.m_ends[-1]
+                del self.m_eoc[-1]
+                events.append((END_CONSTRUCTED, self.m_open.pop(), None))
+                return True
+        if self.m_pending is None:
+            header = peek_header(buffer, self.m_index - base, len(buffer))
+            if header is None:
+                return False
+            tag, content, length = header
+            content += base
+            if end is not None and length is not None and content + length > end:
+                raise Error('ASN1 syntax error')
+            depth = len(self.m_open)
+            if depth >= self.max_depth:
+                raise Error('Maximum nesting depth exceeded.')
+            self.m_count += 1
+            if self.m_count > self.max_nodes:
+                raise Error('Maximum number of nodes exceeded.')
+            node = Node(tag, self.m_index, content - self.m_index, length, depth, length is None)
+            if tag.typ == Types.Constructed:
+                self.m_index = content
+                if length is None:
+                    self.m_ends.append(end)
+                    self.m_eoc.append(True)
+                else:
+                    self.m_ends.append(content + length)
+                    self.m_eoc.append(False)
+                self.m_open.append(node)
+                events.append((START_CONSTRUCTED, node, None))
+                return True
+            if length is None:
+                raise Error('ASN1 syntax error')
+            self.m_pending = node
+        node = self.m_pending
+        start = node.offset + node.header_length - base
+        if start + node.length > len(buffer):
+            return False
+        bytes_data = bytes(buffer[start:start + node.length])
+        value = self.m_decoder._decode_value(node.tag.cls, node.tag.nr, bytes_data)
+        self.m_pending = None
+        self.m_index = node.offset + node.header_length + node.length
+        events.append((PRIMITIVE, node, value))
+        return True
 
-        for i in range(len(remaining)):
-            byte = int(remaining[i])
-            remaining[i] = (byte >> num_unused_bits) | (removed_bits << num_unused_bits)
-            removed_bits = byte & bitmask
 
-        return bytes(remaining)
+def iter_chunks(chunks, max_depth=DEFAULT_MAX_DEPTH,
+                max_nodes=DEFAULT_MAX_NODES):  # type: (Iterable, int, int) -> Iterator
+    """Decode the ASN.1 input split over the byte strings in ``chunks``
+    with an `IncrementalDecoder`, yielding every ``(event, node, value)``
+    tuple as soon as it is complete. A binary file object is read in
+    chunks of ``io.DEFAULT_BUFFER_SIZE`` bytes, which makes this usable
+    with pipes, sockets and decompressing streams."""
+    if hasattr(chunks, 'read'):
+        fileobj = chunks
+        chunks = iter(lambda: fileobj.read(io.DEFAULT_BUFFER_SIZE), b'')
+    decoder = IncrementalDecoder(max_depth, max_nodes)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()